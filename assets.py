@@ -0,0 +1,91 @@
+# assets.py
+# Serve the fingerprinted files written by build_assets.py and rewrite asset
+# references in templates. Without a build, URLs fall back to /static/.
+import os, json, mimetypes
+from flask import current_app, request, send_from_directory, url_for
+from build_assets import DIST_DIR, MANIFEST_PATH
+from geo import LEVELS
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_manifest = {"mtime": None, "data": {}}
+
+
+def load_manifest():
+    try:
+        mtime = os.path.getmtime(MANIFEST_PATH)
+    except OSError:
+        return {}
+
+    if mtime != _manifest["mtime"]:
+        with open(MANIFEST_PATH) as f:
+            _manifest["data"] = json.load(f)
+        _manifest["mtime"] = mtime
+    return _manifest["data"]
+
+
+# ================= TEMPLATE HELPERS =================
+def asset_url(path):
+    hashed = load_manifest().get(path)
+    if hashed:
+        return url_for("dist_asset", filename=hashed)
+    return url_for("static", filename=path)
+
+
+def district_layer_urls():
+    """level -> URL of the district layer, fingerprinted when built."""
+    manifest = load_manifest()
+    has_route = "district_layer" in current_app.view_functions
+    urls = {}
+    for level in LEVELS:
+        hashed = manifest.get(f"geojson/districts/bihar_districts_{level}.geojson")
+        if hashed:
+            urls[level] = url_for("dist_asset", filename=hashed)
+        elif has_route:
+            urls[level] = url_for("district_layer", level=level)
+    return urls
+
+
+# ================= SERVING =================
+def pick_encoding(available):
+    """Best of `available` (preference order) the client accepts with q > 0, or None.
+
+    Uses the parsed Accept-Encoding, so "gzip;q=0" and "*" are honoured.
+    """
+    accepted = request.accept_encodings
+    best, best_q = None, 0
+    for name in available:
+        q = accepted[name]
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def dist_asset(filename):
+    mimetype = mimetypes.guess_type(filename)[0]
+    if filename.endswith(".geojson"):
+        mimetype = "application/geo+json"
+
+    variants = {
+        name: filename + suffix
+        for name, suffix in ENCODINGS
+        if os.path.isfile(os.path.join(DIST_DIR, filename + suffix))
+    }
+    encoding = pick_encoding(variants)
+    path = variants.get(encoding, filename)
+
+    res = send_from_directory(DIST_DIR, path, mimetype=mimetype, max_age=31536000)
+    if encoding:
+        res.headers["Content-Encoding"] = encoding
+    res.headers["Cache-Control"] = IMMUTABLE
+    res.headers["Vary"] = "Accept-Encoding"
+    return res
+
+
+def init_assets(app):
+    app.add_url_rule("/assets/<path:filename>", "dist_asset", dist_asset)
+    app.add_template_global(asset_url)
+    app.add_template_global(district_layer_urls)
@@ -0,0 +1,91 @@
+# bench_csv.py
+# Rows/sec for the old DictReader ingestion loop vs the compiled schema
+# decoder, on a synthetic station CSV.
+#
+#   python bench_csv.py [rows]
+import csv, sys, time, random
+from io import StringIO
+from csv_schema import STATION_SCHEMA
+
+HEADER = [
+    "STATION_NUMBER", "DISTRICT_NAME", "BLOCK_NAME", "PANCHAYAT_NAME", "LATITUDE",
+    "LONGITUDE", "VENDOR_NAME", "STATUS", "RECORDED_TIME"
+]
+STATUSES = ["WORKING", "Not Working", "NON-WORKING", "FAULTY", "", "working"]
+
+
+def synthetic_csv(n):
+    rnd = random.Random(42)
+    buf = StringIO()
+    w = csv.writer(buf)
+    w.writerow(HEADER)
+    for i in range(n):
+        w.writerow([
+            f"AWS{i:06d}", f"DISTRICT{i % 38}", f"BLOCK{i % 534}", f"PANCHAYAT{i % 8000}",
+            "" if i % 97 == 0 else f"{24.3 + rnd.random() * 3:.6f}",
+            "NA" if i % 101 == 0 else f"{83.3 + rnd.random() * 5:.6f}",
+            f"VENDOR{i % 4}", rnd.choice(STATUSES), "01-01-2026"
+        ])
+    return buf.getvalue()
+
+
+# ================= BEFORE =================
+def safe_float(val):
+    try:
+        return float(val)
+    except:
+        return None
+
+
+def normalize_status(raw):
+    if not raw:
+        return "WORKING"
+    raw = raw.strip().upper()
+    if raw in ["NOT WORKING", "NON WORKING", "NON-WORKING", "FAULTY"]:
+        return "NON-WORKING"
+    return "WORKING"
+
+
+def decode_dictreader(text):
+    rows = []
+    for row in csv.DictReader(StringIO(text)):
+        rows.append({
+            "station_id": row.get("STATION_NUMBER"),
+            "district": row.get("DISTRICT_NAME"),
+            "block": row.get("BLOCK_NAME"),
+            "panchayat": row.get("PANCHAYAT_NAME"),
+            "latitude": safe_float(row.get("LATITUDE")),
+            "longitude": safe_float(row.get("LONGITUDE")),
+            "vendor": row.get("VENDOR_NAME"),
+            "status": normalize_status(row.get("STATUS"))
+        })
+    return rows
+
+
+# ================= AFTER =================
+def decode_schema(text):
+    _, rows = STATION_SCHEMA.read(text)
+    return list(rows)
+
+
+def bench(fn, text, n, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return n / best
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    text = synthetic_csv(n)
+
+    assert decode_dictreader(text) == decode_schema(text)
+
+    before = bench(decode_dictreader, text, n)
+    after = bench(decode_schema, text, n)
+    print(f"{n} rows, {len(text) / 1e6:.1f} MB")
+    print(f"DictReader + row.get : {before:>12,.0f} rows/sec")
+    print(f"compiled schema      : {after:>12,.0f} rows/sec ({after / before:.2f}x)")
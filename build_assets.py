@@ -0,0 +1,129 @@
+# build_assets.py
+# Minify, content-hash and pre-compress the dashboard's static files into
+# static/dist/, with a manifest the app uses to rewrite asset URLs.
+#
+#   python build_assets.py
+import os, re, json, gzip, glob, hashlib, shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+
+# paths relative to static/
+ASSETS = [
+    "script/script.js",
+    "css/style.css",
+    "image/image.png",
+    "image/image1.png",
+    "geojson/districts/*.geojson",
+]
+
+COMPRESSIBLE = (".js", ".css", ".geojson", ".json", ".svg", ".html")
+
+
+# ================= MINIFY =================
+def minify_css(src):
+    src = re.sub(r"/\*.*?\*/", "", src, flags=re.S)
+    src = re.sub(r"\s+", " ", src)
+    src = re.sub(r"\s*([{};,])\s*", r"\1", src)
+    src = re.sub(r"([{;])([-\w]+):\s+", r"\1\2:", src)
+    return src.replace(";}", "}").strip() + "\n"
+
+
+def minify_js(src):
+    """Line-level only: drops blank lines, whole-line comments and
+    indentation, and leaves template literal contents untouched. Newlines
+    are kept so automatic semicolon insertion behaves as before."""
+    out = []
+    in_template = False
+    in_comment = False
+
+    for line in src.splitlines():
+        stripped = line.strip()
+
+        if in_comment:
+            if "*/" in stripped:
+                in_comment = False
+            continue
+
+        if not in_template:
+            if not stripped or stripped.startswith("//"):
+                continue
+            if stripped.startswith("/*"):
+                in_comment = "*/" not in stripped
+                continue
+            line = stripped
+
+        out.append(line)
+        if (line.count("`") - line.count("\\`")) % 2:
+            in_template = not in_template
+
+    return "\n".join(out) + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+# ================= BUILD =================
+def hashed_name(path, content):
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest}{ext}"
+
+
+def write_variants(path, content):
+    with open(path, "wb") as f:
+        f.write(content)
+
+    if not path.endswith(COMPRESSIBLE):
+        return
+
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(content, quality=11))
+
+
+def expand(patterns):
+    for pattern in patterns:
+        for path in sorted(glob.glob(os.path.join(STATIC_DIR, pattern))):
+            yield os.path.relpath(path, STATIC_DIR).replace(os.sep, "/")
+
+
+def build():
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    os.makedirs(DIST_DIR)
+
+    manifest = {}
+    for rel in expand(ASSETS):
+        with open(os.path.join(STATIC_DIR, rel), "rb") as f:
+            content = f.read()
+
+        minify = MINIFIERS.get(os.path.splitext(rel)[1])
+        if minify:
+            content = minify(content.decode("utf-8")).encode("utf-8")
+
+        out = hashed_name(rel, content)
+        os.makedirs(os.path.dirname(os.path.join(DIST_DIR, out)), exist_ok=True)
+        write_variants(os.path.join(DIST_DIR, out), content)
+
+        manifest[rel] = out
+        print(f"{rel} -> {out} ({len(content)} bytes)")
+
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    if not brotli:
+        print("brotli not installed: only gzip variants written")
+    return manifest
+
+
+if __name__ == "__main__":
+    build()
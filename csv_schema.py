@@ -0,0 +1,155 @@
+# csv_schema.py
+# Declarative column schemas for the station and FS report CSVs. A schema is
+# compiled against a file's header once; every row is then decoded with
+# positional access only.
+import csv
+from io import StringIO
+from collections import namedtuple
+
+
+class HeaderDriftError(ValueError):
+    pass
+
+
+# ================= CONVERTERS =================
+STATUS_LOOKUP = {
+    "NOT WORKING": "NON-WORKING",
+    "NON WORKING": "NON-WORKING",
+    "NON-WORKING": "NON-WORKING",
+    "FAULTY": "NON-WORKING",
+}
+
+
+def normalize_status(raw):
+    if not raw:
+        return "WORKING"
+    return STATUS_LOOKUP.get(raw.strip().upper(), "WORKING")
+
+
+def to_float(raw):
+    if not raw:
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+
+# ================= SCHEMA =================
+Column = namedtuple("Column", "field header convert required", defaults=(None, False))
+
+
+def normalize_header(h):
+    return h.lstrip("\ufeff").strip().upper()
+
+
+class Decoder:
+    """A schema bound to one header row."""
+
+    def __init__(self, schema, header):
+        names = [normalize_header(h) for h in header]
+        positions = {}
+        for i, name in enumerate(names):
+            positions.setdefault(name, i)
+
+        self.schema = schema
+        self.width = len(names)
+        self.missing = [c.header for c in schema.columns if normalize_header(c.header) not in positions]
+        known = {normalize_header(c.header) for c in schema.columns}
+        known.update(normalize_header(h) for h in schema.ignored)
+        self.extra = [h for h, n in zip(header, names) if n and n not in known]
+
+        required = [c.header for c in schema.columns if c.required and c.header in self.missing]
+        if required:
+            raise HeaderDriftError(f"{schema.name}: missing required columns {required}")
+
+        # (field, position, converter) for the columns this header has
+        spec = tuple(
+            (c.field, positions[normalize_header(c.header)], c.convert)
+            for c in schema.columns
+            if normalize_header(c.header) in positions
+        )
+        absent = tuple(c.field for c in schema.columns if normalize_header(c.header) not in positions)
+
+        def decode(r):
+            doc = {}
+            for field, pos, convert in spec:
+                doc[field] = convert(r[pos]) if convert else r[pos]
+            for field in absent:
+                doc[field] = None
+            return doc
+
+        self._decode = decode
+
+    @property
+    def drifted(self):
+        return bool(self.missing or self.extra)
+
+    def decode(self, row):
+        if len(row) < self.width:
+            row = row + [""] * (self.width - len(row))
+        return self._decode(row)
+
+    def decode_rows(self, rows):
+        decode = self._decode
+        width = self.width
+        for row in rows:
+            if not row:
+                continue
+            if len(row) < width:
+                row = row + [""] * (width - len(row))
+            yield decode(row)
+
+
+class Schema:
+    """`ignored` lists headers upstream sends that we don't store; they are
+    not reported as drift."""
+
+    def __init__(self, name, columns, ignored=()):
+        self.name = name
+        self.columns = columns
+        self.ignored = ignored
+
+    def compile(self, header):
+        return Decoder(self, header)
+
+    def read(self, text):
+        """(decoder, iterator of decoded docs) for CSV text."""
+        reader = csv.reader(StringIO(text))
+        header = next(reader, None)
+        if header is None:
+            raise HeaderDriftError(f"{self.name}: empty file")
+        decoder = self.compile(header)
+        return decoder, decoder.decode_rows(reader)
+
+
+# ================= FORMATS =================
+STATION_SCHEMA = Schema("station", [
+    Column("station_id", "STATION_NUMBER", required=True),
+    Column("district", "DISTRICT_NAME"),
+    Column("block", "BLOCK_NAME"),
+    Column("panchayat", "PANCHAYAT_NAME"),
+    Column("latitude", "LATITUDE", to_float),
+    Column("longitude", "LONGITUDE", to_float),
+    Column("vendor", "VENDOR_NAME"),
+    Column("status", "STATUS", normalize_status, required=True),
+], ignored=("RECORDED_TIME",))
+
+FS_SCHEMA = Schema("fs_report", [
+    Column("station_id", "STATION_ID", required=True),
+    Column("temp_rh", "TEMP.RH"),
+    Column("rf", "RF"),
+    Column("ws", "WS"),
+    Column("ap", "AP"),
+    Column("sm", "SM"),
+    Column("sr", "SR"),
+    Column("data_pkt", "DATA_PKT"),
+    Column("agency", "Agency"),
+])
+
+
+def report_drift(decoder, source):
+    if decoder.missing:
+        print("Header drift:", source, "missing", decoder.missing)
+    if decoder.extra:
+        print("Header drift:", source, "unexpected", decoder.extra)
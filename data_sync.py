@@ -1,11 +1,17 @@
 # data_sync.py
-import requests, csv, os
-from io import StringIO
+import requests, os
 from datetime import datetime
 from pymongo import MongoClient
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from dotenv import load_dotenv
+from geo import district_aggregates
+from search_index import station_search
+from csv_schema import STATION_SCHEMA, FS_SCHEMA, HeaderDriftError, report_drift
+from station_store import (
+    ensure_indexes, store_station_rows, store_fault_rows, day_rows, district_col, changes_col,
+    to_day, previous_date, day_statuses, get_master
+)
 
 load_dotenv()
 
@@ -14,24 +20,8 @@ BASE_URL = os.getenv("BASE_URL")
 
 client = MongoClient("mongodb://localhost:27017/")
 db = client["bmsk_dashboard"]
-stations_col = db["stations"]
 faulty_col = db["station_faults"]
 
-# ================= UTILS =================
-def safe_float(val):
-    try:
-        return float(val)
-    except:
-        return None
-
-def normalize_status(raw):
-    if not raw:
-        return "WORKING"
-    raw = raw.strip().upper()
-    if raw in ["NOT WORKING", "NON WORKING", "NON-WORKING", "FAULTY"]:
-        return "NON-WORKING"
-    return "WORKING"
-
 # ================= STATION DATA =================
 def get_csv_url_by_date(station_type, date):
     res = requests.get(BASE_URL, timeout=20)
@@ -53,30 +43,103 @@ def fetch_and_store_station_data(station_type, date):
         return
 
     res = requests.get(csv_url, timeout=20)
-    reader = csv.DictReader(StringIO(res.text))
-
-    for row in reader:
-        doc = {
-            "station_id": row.get("STATION_NUMBER"),
-            "station_type": station_type,
-            "district": row.get("DISTRICT_NAME"),
-            "block": row.get("BLOCK_NAME"),
-            "panchayat": row.get("PANCHAYAT_NAME"),
-            "latitude": safe_float(row.get("LATITUDE")),
-            "longitude": safe_float(row.get("LONGITUDE")),
-            "vendor": row.get("VENDOR_NAME"),
-            "status": normalize_status(row.get("STATUS")),
-            "recorded_time": row.get("RECORDED_TIME"),
-            "data_date": date,
-            "created_at": datetime.utcnow()
-        }
-
-        stations_col.update_one(
-            {"station_id": doc["station_id"], "station_type": station_type, "data_date": date},
-            {"$set": doc},
+    try:
+        decoder, rows = STATION_SCHEMA.read(res.text)
+    except HeaderDriftError as e:
+        print("CSV skipped:", csv_url, e)
+        return
+    report_drift(decoder, csv_url)
+
+    store_station_rows(station_type, date, rows)
+
+# ================= DISTRICT SUMMARY =================
+def store_district_summary(station_type, date):
+    data_date = to_day(date)
+    rows = list(day_rows(station_type, date))
+    if not rows:
+        # the day's CSV was missing or skipped; an empty summary would read as "no stations"
+        print("District summary skipped, no facts:", station_type, date)
+        return
+
+    for agg in district_aggregates(rows):
+        if agg["mismatched"]:
+            print("District mismatch:", station_type, agg["district"], len(agg["mismatched"]))
+
+        district_col.update_one(
+            {"station_type": station_type, "data_date": data_date, "district": agg["district"]},
+            {"$set": {**agg, "station_type": station_type, "data_date": data_date}},
             upsert=True
         )
 
+# ================= DAY-OVER-DAY CHANGES =================
+def diff_days(prev, cur):
+    """Sorted merge of two (station_id, status) streams ordered by station_id.
+
+    A station that first appears already NON-WORKING counts as newly failed;
+    stations missing from `cur` are ignored.
+    """
+    newly_failed, recovered, still_failing = [], [], []
+    prev = iter(prev)
+    p = next(prev, None)
+
+    for sid, status in cur:
+        while p is not None and p[0] < sid:
+            p = next(prev, None)
+
+        was_failing = p is not None and p[0] == sid and p[1] == "NON-WORKING"
+        if status == "NON-WORKING":
+            (still_failing if was_failing else newly_failed).append(sid)
+        elif was_failing:
+            recovered.append(sid)
+
+    return {"newly_failed": newly_failed, "recovered": recovered, "still_failing": still_failing}
+
+
+def change_breakdown(diff, master, field):
+    out = {}
+    for kind, ids in diff.items():
+        for sid in ids:
+            key = master.get(sid, {}).get(field)
+            row = out.setdefault(key, {field: key, "newly_failed": 0, "recovered": 0, "still_failing": 0})
+            row[kind] += 1
+    return sorted(out.values(), key=lambda r: (-r["newly_failed"], str(r[field])))
+
+
+def store_station_changes(station_type, date):
+    """Store the diff between `date` and the previous day with facts.
+
+    Returns the stored document, or None when `date` has no facts: a missing
+    or skipped CSV must not be published as "nothing changed".
+    """
+    data_date = to_day(date)
+    cur = list(day_statuses(station_type, data_date))
+    if not cur:
+        print("Station changes skipped, no facts:", station_type, date)
+        return None
+
+    prev_date = previous_date(station_type, data_date)
+    prev = day_statuses(station_type, prev_date) if prev_date else []
+
+    diff = diff_days(prev, cur)
+    master = get_master(station_type)
+
+    doc = {
+        **diff,
+        "station_type": station_type,
+        "data_date": data_date,
+        "previous_date": prev_date,
+        "counts": {k: len(v) for k, v in diff.items()},
+        "by_vendor": change_breakdown(diff, master, "vendor"),
+        "by_district": change_breakdown(diff, master, "district"),
+        "created_at": datetime.utcnow()
+    }
+    changes_col.update_one(
+        {"station_type": station_type, "data_date": data_date},
+        {"$set": doc},
+        upsert=True
+    )
+    return doc
+
 # ================= FS FAULT DATA =================
 def get_fs_folder(date):
     return datetime.strptime(date, "%Y-%m-%d").strftime("%d%m%Y") + "/"
@@ -94,34 +157,29 @@ def fetch_faulty_data(date):
 
         csv_url = url + href
         res_csv = requests.get(csv_url, timeout=20)
-        reader = csv.DictReader(StringIO(res_csv.text))
-
-        for row in reader:
-            fs = {
-                "station_id": row.get("STATION_ID"),
-                "temp_rh": row.get("TEMP.RH"),
-                "rf": row.get("RF"),
-                "ws": row.get("WS"),
-                "ap": row.get("AP"),
-                "sm": row.get("SM"),
-                "sr": row.get("SR"),
-                "data_pkt": row.get("DATA_PKT"),
-                "agency": row.get("Agency"),
-                "data_date": date
-            }
-
-            stations_col.update_many(
-                {"station_id": fs["station_id"], "status": "NON-WORKING", "data_date": date},
-                {"$set": {"fault_data": fs}}
-            )
+        try:
+            decoder, fs_records = FS_SCHEMA.read(res_csv.text)
+        except HeaderDriftError as e:
+            print("CSV skipped:", csv_url, e)
+            continue
+        report_drift(decoder, csv_url)
+
+        store_fault_rows(date, fs_records)
 
 # ================= MAIN JOB =================
 def run_daily_sync():
     date = datetime.now().strftime("%Y-%m-%d")
     print("AUTO SYNC START:", date)
 
+    ensure_indexes()
+
     fetch_and_store_station_data("AWS", date)
     fetch_and_store_station_data("ARG", date)
     fetch_faulty_data(date)
+    store_district_summary("AWS", date)
+    store_district_summary("ARG", date)
+    store_station_changes("AWS", date)
+    store_station_changes("ARG", date)
+    station_search.refresh(force=True)
 
     print(" AUTO SYNC DONE")
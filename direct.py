@@ -1,36 +1,84 @@
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, jsonify, render_template, request, g
+from upstream import CircuitBreaker, SWRCache, UpstreamUnavailable, UpstreamClientError
+from assets import init_assets
 import requests
+import os
 
 app = Flask(__name__)
+init_assets(app)
 
 # =================================================
 # 🔴 EXTERNAL APIs
 # =================================================
-DAILY_STATUS_API = "http://117.244.242.86:8080/bmskinternal/dailydata/faultydashboard/"
-FAULT_STATION_API = "http://117.244.242.86:8080/bmskinternal/dailydata/FS_Report/"
+UPSTREAM_BASE = os.getenv("UPSTREAM_BASE", "http://117.244.242.86:8080")
+DAILY_STATUS_API = UPSTREAM_BASE + "/bmskinternal/dailydata/faultydashboard/"
+FAULT_STATION_API = UPSTREAM_BASE + "/bmskinternal/dailydata/FS_Report/"
+
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "10"))
+
+# one breaker per upstream host: both APIs fail together
+breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("UPSTREAM_FAILURES", "3")),
+    reset_timeout=float(os.getenv("UPSTREAM_RESET", "30"))
+)
+cache = SWRCache(breaker, fresh_for=float(os.getenv("UPSTREAM_FRESH", "60")))
 
 
 # =================================================
 # HELPERS
 # =================================================
+def fetch_upstream(url, station_type, date):
+    def fetch():
+        r = requests.get(
+            url,
+            params={"type": station_type, "date": date},
+            timeout=UPSTREAM_TIMEOUT
+        )
+        r.raise_for_status()
+        return r.json()   # list
+
+    data, meta = cache.get((url, station_type, date), fetch)
+
+    # the response reports the oldest data it was built from
+    if "freshness" not in g or meta["age"] > g.freshness["age"]:
+        g.freshness = meta
+    return data
+
+
 def fetch_daily_data(station_type, date):
-    r = requests.get(
-        DAILY_STATUS_API,
-        params={"type": station_type, "date": date},
-        timeout=30
-    )
-    r.raise_for_status()
-    return r.json()   # list
+    return fetch_upstream(DAILY_STATUS_API, station_type, date)
 
 
 def fetch_fault_data(station_type, date):
-    r = requests.get(
-        FAULT_STATION_API,
-        params={"type": station_type, "date": date},
-        timeout=30
-    )
-    r.raise_for_status()
-    return r.json()   # list
+    return fetch_upstream(FAULT_STATION_API, station_type, date)
+
+
+@app.after_request
+def add_freshness_headers(res):
+    meta = g.get("freshness")
+    if meta:
+        res.headers["Age"] = str(meta["age"])
+        res.headers["X-Data-Stale"] = "1" if meta["stale"] else "0"
+        res.headers["X-Data-Fetched-At"] = str(int(meta["fetched_at"]))
+        res.headers["X-Upstream-Circuit"] = meta["circuit"]
+    return res
+
+
+@app.errorhandler(UpstreamUnavailable)
+def upstream_unavailable(e):
+    res = jsonify({"error": "upstream unavailable", "detail": str(e), "circuit": breaker.state})
+    res.status_code = 503
+    res.headers["Retry-After"] = str(breaker.retry_after() or 30)
+    res.headers["X-Upstream-Circuit"] = breaker.state
+    return res
+
+
+@app.errorhandler(UpstreamClientError)
+def upstream_client_error(e):
+    # upstream rejected this request; pass its status through, nothing is down
+    res = jsonify({"error": "upstream rejected the request", "detail": str(e)})
+    res.status_code = e.status
+    return res
 
 
 # ================= HOME =================
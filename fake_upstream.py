@@ -0,0 +1,79 @@
+# fake_upstream.py
+# Local stand-in for the BMSK upstream APIs, for exercising direct.py's
+# stale-while-revalidate cache and circuit breaker.
+#
+#   python fake_upstream.py                                   (port 9090)
+#   UPSTREAM_BASE=http://localhost:9090 python direct.py
+#
+# Latency and failures can be changed while it runs:
+#   curl "localhost:9090/control?latency=12&error_rate=1"
+#   curl "localhost:9090/control?latency=0&error_rate=0"
+import random, time, os
+from flask import Flask, jsonify, request
+
+app = Flask(__name__)
+
+settings = {
+    "latency": float(os.getenv("FAKE_LATENCY", "0")),        # seconds per call
+    "error_rate": float(os.getenv("FAKE_ERROR_RATE", "0")),  # 0..1, answered with a 500
+    "stations": int(os.getenv("FAKE_STATIONS", "500")),
+}
+stats = {"calls": 0, "errors": 0}
+
+VENDORS = ["VENDOR-A", "VENDOR-B", "VENDOR-C"]
+DISTRICTS = ["PATNA", "GAYA", "NALANDA", "BHAGALPUR", "MUZAFFARPUR", "DARBHANGA"]
+
+
+def stations(station_type, date):
+    rnd = random.Random(f"{station_type}{date}")
+    out = []
+    for i in range(settings["stations"]):
+        out.append({
+            "station_id": f"{station_type}{i:05d}",
+            "district": DISTRICTS[i % len(DISTRICTS)],
+            "block": f"BLOCK-{i % 40}",
+            "panchayat": f"PANCHAYAT-{i % 200}",
+            "vendor": VENDORS[i % len(VENDORS)],
+            "latitude": 24.5 + rnd.random() * 2.5,
+            "longitude": 83.5 + rnd.random() * 4.5,
+            "status": "NON-WORKING" if rnd.random() < 0.2 else "WORKING",
+        })
+    return out
+
+
+def respond(data):
+    stats["calls"] += 1
+    time.sleep(settings["latency"])
+    if random.random() < settings["error_rate"]:
+        stats["errors"] += 1
+        return jsonify({"error": "injected failure"}), 500
+    return jsonify(data)
+
+
+@app.route("/bmskinternal/dailydata/faultydashboard/")
+def daily():
+    return respond(stations(request.args.get("type"), request.args.get("date")))
+
+
+@app.route("/bmskinternal/dailydata/FS_Report/")
+def faults():
+    rows = []
+    for s in stations(request.args.get("type"), request.args.get("date")):
+        if s["status"] == "NON-WORKING":
+            s["fault_data"] = {"temp_rh": "x", "rf": "ok", "ws": "x", "agency": s["vendor"]}
+            rows.append(s)
+    return respond(rows)
+
+
+@app.route("/control")
+def control():
+    for key in ("latency", "error_rate"):
+        if key in request.args:
+            settings[key] = float(request.args[key])
+    if "stations" in request.args:
+        settings["stations"] = int(request.args["stations"])
+    return jsonify({**settings, **stats})
+
+
+if __name__ == "__main__":
+    app.run(port=int(os.getenv("FAKE_PORT", "9090")), threaded=True)
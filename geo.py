@@ -0,0 +1,335 @@
+# geo.py
+import json, gzip, os, sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GEOJSON_PATH = os.path.join(BASE_DIR, "static", "geojson", "bihar.geojson")
+LAYER_DIR = os.path.join(BASE_DIR, "static", "geojson", "districts")
+
+# simplification tolerance (degrees) and coordinate precision per level
+LEVELS = {
+    "low": {"tolerance": 0.01, "precision": 3},
+    "medium": {"tolerance": 0.003, "precision": 4},
+    "high": {"tolerance": 0.0008, "precision": 5},
+}
+DEFAULT_LEVEL = "medium"
+
+# property names used for the district name by common Bihar boundary files
+DISTRICT_KEYS = ("district", "DISTRICT", "dtname", "DTNAME", "DIST_NAME", "NAME_2", "name", "NAME")
+
+GRID_CELL = 0.25  # degrees
+
+
+# ================= UTILS =================
+def normalize_district(name):
+    if not name:
+        return None
+    return " ".join(str(name).strip().upper().split())
+
+
+def district_name(props):
+    for key in DISTRICT_KEYS:
+        if props.get(key):
+            return normalize_district(props[key])
+    return None
+
+
+def feature_polygons(geometry):
+    if not geometry:
+        return []
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+def load_features(path=GEOJSON_PATH):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return []
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return [ft for ft in data.get("features", []) if feature_polygons(ft.get("geometry"))]
+
+
+# ================= SIMPLIFY =================
+def _segment_dist2(p, a, b):
+    ax, ay = a
+    dx, dy = b[0] - ax, b[1] - ay
+    if dx == 0 and dy == 0:
+        return (p[0] - ax) ** 2 + (p[1] - ay) ** 2
+    t = ((p[0] - ax) * dx + (p[1] - ay) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    return (p[0] - ax - t * dx) ** 2 + (p[1] - ay - t * dy) ** 2
+
+
+def simplify_line(points, tolerance):
+    """Douglas-Peucker, iterative so large rings don't hit the recursion limit."""
+    if len(points) < 3:
+        return points
+
+    tol2 = tolerance * tolerance
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        max_d, index = 0.0, None
+        for i in range(first + 1, last):
+            d = _segment_dist2(points[i], points[first], points[last])
+            if d > max_d:
+                max_d, index = d, i
+        if index is not None and max_d > tol2:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [p for p, k in zip(points, keep) if k]
+
+
+def quantize_ring(ring, precision):
+    out = []
+    for x, y in ((p[0], p[1]) for p in ring):
+        pt = [round(x, precision), round(y, precision)]
+        if not out or out[-1] != pt:
+            out.append(pt)
+    return out
+
+
+def _open_ring(ring):
+    """Ring as hashable points, without the closing point or repeated vertices."""
+    pts = []
+    for p in ring:
+        pt = (round(p[0], 7), round(p[1], 7))
+        if not pts or pts[-1] != pt:
+            pts.append(pt)
+    if len(pts) > 1 and pts[0] == pts[-1]:
+        pts.pop()
+    return pts
+
+
+class ArcSimplifier:
+    """Simplify rings arc by arc, the way TopoJSON does.
+
+    Rings are cut wherever the set of rings sharing an edge changes, so a
+    border shared by two districts becomes one arc. Each arc is simplified
+    once, in a canonical direction, and both neighbours reuse the result:
+    shared borders stay identical and the choropleth has no gaps or slivers.
+    """
+
+    def __init__(self, rings, tolerance):
+        self.tolerance = tolerance
+        self.cache = {}
+        self.edges = {}
+        for rid, pts in enumerate(rings):
+            n = len(pts)
+            for i in range(n):
+                self.edges.setdefault(frozenset((pts[i], pts[(i + 1) % n])), set()).add(rid)
+
+    def _arc(self, arc):
+        canon = min(arc, arc[::-1])
+        key = tuple(canon)
+        if key not in self.cache:
+            self.cache[key] = self._simplify(canon)
+        out = self.cache[key]
+        return out if canon == arc else out[::-1]
+
+    def _simplify(self, arc):
+        """Douglas-Peucker, but never below one interior vertex (two for a
+        closed arc), so no ring built from arcs collapses below a triangle.
+        Decided per arc, both neighbours still get the same border."""
+        out = simplify_line(arc, self.tolerance)
+        need = 2 if arc[0] == arc[-1] else 1
+        if len(out) - 2 < need <= len(arc) - 2:
+            last = len(arc) - 1
+            out = [arc[round(i * last / (need + 1))] for i in range(need + 2)]
+        return out
+
+    def ring(self, pts):
+        n = len(pts)
+        if n < 3:
+            return [list(p) for p in pts]
+
+        owners = [self.edges[frozenset((pts[i], pts[(i + 1) % n]))] for i in range(n)]
+        junctions = [i for i in range(n) if owners[i - 1] != owners[i]]
+
+        if not junctions:
+            # a ring shared whole (enclave) or not at all: start at its smallest
+            # point so every ring using it cuts it the same way
+            start = min(range(n), key=lambda i: pts[i])
+            out = self._arc(pts[start:] + pts[:start] + [pts[start]])
+        else:
+            out = []
+            for k, j in enumerate(junctions):
+                length = (junctions[(k + 1) % len(junctions)] - j) % n or n
+                arc = self._arc([pts[(j + t) % n] for t in range(length + 1)])
+                out.extend(arc if not out else arc[1:])
+
+        return [list(p) for p in out]
+
+
+def build_layer(features, tolerance, precision):
+    polys = [
+        (ft, [[_open_ring(r) for r in poly] for poly in feature_polygons(ft["geometry"])])
+        for ft in features
+    ]
+    simplifier = ArcSimplifier([r for _, ps in polys for poly in ps for r in poly], tolerance)
+
+    out = []
+    for ft, ps in polys:
+        polygons = []
+        for poly in ps:
+            rings = [quantize_ring(simplifier.ring(r), precision) for r in poly]
+            # rounding can still collapse a tiny ring; drop it rather than emit an invalid one
+            rings = [r for i, r in enumerate(rings) if len(r) >= 4 or i == 0]
+            if len(rings[0]) >= 4:
+                polygons.append(rings)
+        if not polygons:
+            continue
+        out.append({
+            "type": "Feature",
+            "properties": {"district": district_name(ft.get("properties") or {})},
+            "geometry": {"type": "MultiPolygon", "coordinates": polygons}
+        })
+    return {"type": "FeatureCollection", "features": out}
+
+
+def layer_path(level, compressed=False):
+    path = os.path.join(LAYER_DIR, f"bihar_districts_{level}.geojson")
+    return path + ".gz" if compressed else path
+
+
+def build_layers(path=GEOJSON_PATH):
+    features = load_features(path)
+    if not features:
+        print("No district features in", path)
+        return {}
+
+    os.makedirs(LAYER_DIR, exist_ok=True)
+    sizes = {}
+    for level, cfg in LEVELS.items():
+        layer = build_layer(features, cfg["tolerance"], cfg["precision"])
+        raw = json.dumps(layer, separators=(",", ":")).encode("utf-8")
+
+        with open(layer_path(level), "wb") as f:
+            f.write(raw)
+        with open(layer_path(level, compressed=True), "wb") as f:
+            f.write(gzip.compress(raw, compresslevel=9, mtime=0))
+
+        sizes[level] = len(raw)
+        print(f"{level}: {len(layer['features'])} districts, {len(raw)} bytes")
+    return sizes
+
+
+# ================= SPATIAL INDEX =================
+def _point_in_ring(x, y, ring):
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def _point_in_polygon(x, y, poly):
+    if not _point_in_ring(x, y, poly[0]):
+        return False
+    return not any(_point_in_ring(x, y, hole) for hole in poly[1:])
+
+
+class DistrictIndex:
+    """Uniform grid over polygon bounding boxes; a lookup only tests the
+    polygons registered in the point's cell."""
+
+    def __init__(self, features, cell=GRID_CELL):
+        self.cell = cell
+        self.polygons = []
+        self.grid = {}
+
+        for ft in features:
+            name = district_name(ft.get("properties") or {})
+            for poly in feature_polygons(ft["geometry"]):
+                xs = [p[0] for p in poly[0]]
+                ys = [p[1] for p in poly[0]]
+                bbox = (min(xs), min(ys), max(xs), max(ys))
+                idx = len(self.polygons)
+                self.polygons.append((name, bbox, poly))
+
+                for cx in range(self._cell(bbox[0]), self._cell(bbox[2]) + 1):
+                    for cy in range(self._cell(bbox[1]), self._cell(bbox[3]) + 1):
+                        self.grid.setdefault((cx, cy), []).append(idx)
+
+    def _cell(self, v):
+        return int(v // self.cell)
+
+    def __len__(self):
+        return len(self.polygons)
+
+    def locate(self, lat, lon):
+        if lat is None or lon is None:
+            return None
+        for idx in self.grid.get((self._cell(lon), self._cell(lat)), ()):
+            name, (minx, miny, maxx, maxy), poly = self.polygons[idx]
+            if minx <= lon <= maxx and miny <= lat <= maxy and _point_in_polygon(lon, lat, poly):
+                return name
+        return None
+
+
+_index = {"mtime": None, "index": None}
+
+
+def get_district_index():
+    """Index over bihar.geojson, rebuilt when the file changes on disk."""
+    try:
+        mtime = os.path.getmtime(GEOJSON_PATH)
+    except OSError:
+        mtime = None
+
+    if _index["index"] is None or mtime != _index["mtime"]:
+        index = DistrictIndex(load_features(GEOJSON_PATH))
+        # an empty index is never kept, so adding boundary data needs no restart
+        if len(index):
+            _index["mtime"], _index["index"] = mtime, index
+        return index
+    return _index["index"]
+
+
+# ================= DISTRICT AGGREGATES =================
+def district_aggregates(rows):
+    """Per-district working / non-working counts for one day's station rows.
+
+    Stations whose coordinates fall inside a different district polygon than
+    their `district` label are listed under `mismatched`.
+    """
+    index = get_district_index()
+    out = {}
+
+    for s in rows:
+        district = normalize_district(s.get("district"))
+        agg = out.setdefault(district, {
+            "district": district,
+            "total": 0,
+            "working": 0,
+            "non_working": 0,
+            "mismatched": []
+        })
+
+        agg["total"] += 1
+        if s.get("status") == "WORKING":
+            agg["working"] += 1
+        else:
+            agg["non_working"] += 1
+
+        if len(index):
+            located = index.locate(s.get("latitude"), s.get("longitude"))
+            if located and located != district:
+                agg["mismatched"].append({"station_id": s.get("station_id"), "located": located})
+
+    return list(out.values())
+
+
+if __name__ == "__main__":
+    build_layers(sys.argv[1] if len(sys.argv) > 1 else GEOJSON_PATH)
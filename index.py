@@ -1,17 +1,51 @@
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, jsonify, render_template, request, send_file, abort
 from pymongo import MongoClient
-from datetime import datetime
+from datetime import timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 from data_sync import run_daily_sync
+from geo import LEVELS, DEFAULT_LEVEL, layer_path
+from station_store import district_col, changes_col, latest_rows, status_counts, to_day
+from retention import run_retention
+from search_index import station_search
+from assets import init_assets, pick_encoding
+import os
 import atexit
 
 
 app = Flask(__name__)
+init_assets(app)
 
 # ================= DB =================
 client = MongoClient("mongodb://localhost:27017/")
 db = client["bmsk_dashboard"]
-stations = db["stations"]
+
+MAX_RANGE_DAYS = int(os.getenv("MAX_RANGE_DAYS", "92"))
+
+
+# ================= DATE RANGE =================
+def requested_range():
+    """[start, end) datetimes for ?date=YYYY-MM-DD or ?from=...&to=... (inclusive).
+
+    Over a range every route reports each station once, with its latest status
+    in the range; a one-day range is just that day. Ranges longer than
+    MAX_RANGE_DAYS keep their last MAX_RANGE_DAYS days.
+
+    Returns None when no date is given or it can't be parsed.
+    """
+    start = request.args.get("from") or request.args.get("date")
+    end = request.args.get("to") or start
+    if not start:
+        return None
+
+    try:
+        start, end = to_day(start), to_day(end)
+    except ValueError:
+        return None
+
+    if end < start:
+        start, end = end, start
+    start = max(start, end - timedelta(days=MAX_RANGE_DAYS - 1))
+    return start, end + timedelta(days=1)
 
 
 # ================= HOME =================
@@ -24,32 +58,19 @@ def home():
 @app.route("/api/summary")
 def summary():
     station_type = request.args.get("type")
-    date = request.args.get("date")
+    date_range = requested_range()
 
-    if not station_type or not date:
+    if not station_type or not date_range:
         return jsonify({"working": 0, "not_working": 0})
 
-    rec_date = datetime.strptime(date, "%Y-%m-%d").strftime("%d-%m-%Y")
-
-    pipeline = [
-        {"$match": {
-            "station_type": station_type,
-            "recorded_time": rec_date
-        }},
-        {"$group": {
-            "_id": "$status",
-            "count": {"$sum": 1}
-        }}
-    ]
-
     working = 0
     not_working = 0
 
-    for r in stations.aggregate(pipeline):
-        if r["_id"] == "WORKING":
-            working = r["count"]
+    for status, count in status_counts(station_type, *date_range).items():
+        if status == "WORKING":
+            working = count
         else:
-            not_working += r["count"]
+            not_working += count
 
     return jsonify({
         "working": working,
@@ -61,24 +82,17 @@ def summary():
 @app.route("/api/map")
 def map_data():
     station_type = request.args.get("type")
-    date = request.args.get("date")
+    date_range = requested_range()
     status = request.args.get("status")
 
-    if not station_type or not date:
+    if not station_type or not date_range:
         return jsonify([])
 
-    rec_date = datetime.strptime(date, "%Y-%m-%d").strftime("%d-%m-%Y")
-
-    query = {
-        "station_type": station_type,
-        "recorded_time": rec_date
-    }
-
-    if status and status != "ALL":
-        query["status"] = status
-
     data = []
-    for s in stations.find(query, {"_id": 0}):
+    for s in latest_rows(station_type, *date_range):
+        # filter on the latest status, not on any day that matched
+        if status and status != "ALL" and s.get("status") != status:
+            continue
         if s.get("latitude") and s.get("longitude"):
             data.append({
                 "station_id": s.get("station_id"),
@@ -97,34 +111,17 @@ def map_data():
 @app.route("/api/vendor-summary")
 def vendor_summary():
     station_type = request.args.get("type")
-    date = request.args.get("date")
+    date_range = requested_range()
 
-    if not station_type or not date:
+    if not station_type or not date_range:
         return jsonify([])
 
-    rec_date = datetime.strptime(date, "%Y-%m-%d").strftime("%d-%m-%Y")
-
-    pipeline = [
-        {"$match": {
-            "station_type": station_type,
-            "recorded_time": rec_date,
-            "vendor": {"$ne": None}
-        }},
-        {"$group": {
-            "_id": {
-                "vendor": "$vendor",
-                "status": "$status"
-            },
-            "count": {"$sum": 1}
-        }}
-    ]
-
     vendor_map = {}
 
-    for r in stations.aggregate(pipeline):
-        vendor = r["_id"]["vendor"]
-        status = r["_id"]["status"]
-        count = r["count"]
+    for s in latest_rows(station_type, *date_range):
+        vendor = s.get("vendor")
+        if vendor is None:
+            continue
 
         vendor_map.setdefault(vendor, {
             "vendor": vendor,
@@ -133,11 +130,11 @@ def vendor_summary():
             "not_working": 0
         })
 
-        vendor_map[vendor]["total"] += count
-        if status == "WORKING":
-            vendor_map[vendor]["working"] += count
+        vendor_map[vendor]["total"] += 1
+        if s.get("status") == "WORKING":
+            vendor_map[vendor]["working"] += 1
         else:
-            vendor_map[vendor]["not_working"] += count
+            vendor_map[vendor]["not_working"] += 1
 
     return jsonify(list(vendor_map.values()))
 
@@ -185,50 +182,31 @@ def vendor_district_summary():
     vendor = request.args.get("vendor")
     status = request.args.get("status")  # WORKING / NON-WORKING (frontend logic)
     station_type = request.args.get("type")
-    date = request.args.get("date")
+    date_range = requested_range()
 
-    if not vendor or not station_type or not date:
+    if not vendor or not station_type or not date_range:
         return jsonify([])
 
-    rec_date = datetime.strptime(date, "%Y-%m-%d").strftime("%d-%m-%Y")
-
-    pipeline = [
-        {
-            "$match": {
-                "station_type": station_type,
-                "recorded_time": rec_date,
-                "vendor": vendor
-            }
-        },
-        {
-            "$group": {
-                "_id": "$district",
-
-                # total installed sensors
-                "total_installed": {"$sum": 1},
-
-                #working count
-                "working": {
-                    "$sum": {
-                        "$cond": [{"$eq": ["$status", "WORKING"]}, 1, 0]
-                    }
-                },
+    district_map = {}
 
-                # non-working count
-                "non_working": {
-                    "$sum": {
-                        "$cond": [{"$eq": ["$status", "NON-WORKING"]}, 1, 0]
-                    }
-                },
+    for s in latest_rows(station_type, *date_range, {"vendor": vendor}):
+        district = s.get("district")
+        r = district_map.setdefault(district, {
+            "district": district,
+            "total_installed": 0,  # total installed sensors
+            "working": 0,
+            "non_working": 0,
+            "agency": vendor
+        })
 
-                "agency": {"$first": "$vendor"}
-            }
-        },
-        {"$sort": {"total_installed": -1}}
-    ]
+        r["total_installed"] += 1
+        if s.get("status") == "WORKING":
+            r["working"] += 1
+        elif s.get("status") == "NON-WORKING":
+            r["non_working"] += 1
 
     data = []
-    for r in stations.aggregate(pipeline):
+    for r in sorted(district_map.values(), key=lambda x: x["total_installed"], reverse=True):
         #  Frontend ke status ke according district dikhana
         if status == "WORKING" and r["working"] == 0:
             continue
@@ -236,7 +214,7 @@ def vendor_district_summary():
             continue
 
         data.append({
-            "district": r["_id"],
+            "district": r["district"],
             "total_installed": r["total_installed"],
             "working": r["working"],
             "non_working": r["non_working"],
@@ -246,31 +224,150 @@ def vendor_district_summary():
     return jsonify(data)
 
 
+# ================= DISTRICT LAYER =================
+@app.route("/api/geo/districts")
+def district_layer():
+    level = request.args.get("level", DEFAULT_LEVEL)
+    if level not in LEVELS:
+        level = DEFAULT_LEVEL
+
+    path = layer_path(level)
+    gz_path = layer_path(level, compressed=True)
+
+    if os.path.exists(gz_path) and pick_encoding(["gzip"]):
+        res = send_file(gz_path, mimetype="application/geo+json")
+        res.headers["Content-Encoding"] = "gzip"
+    elif os.path.exists(path):
+        res = send_file(path, mimetype="application/geo+json")
+    else:
+        abort(404)
+
+    res.headers["Vary"] = "Accept-Encoding"
+    res.headers["Cache-Control"] = "public, max-age=86400"
+    return res
+
+
+@app.route("/api/district-summary")
+def district_summary():
+    station_type = request.args.get("type")
+    date_range = requested_range()
+
+    if not station_type or not date_range:
+        return jsonify([])
+
+    pipeline = [
+        {"$match": {
+            "station_type": station_type,
+            "data_date": {"$gte": date_range[0], "$lt": date_range[1]}
+        }},
+        {"$sort": {"data_date": 1}},
+        # each district as of the last synced day in the range
+        {"$group": {
+            "_id": "$district",
+            "total": {"$last": "$total"},
+            "working": {"$last": "$working"},
+            "non_working": {"$last": "$non_working"},
+            "mismatched": {"$last": "$mismatched"}
+        }}
+    ]
+
+    data = []
+    for r in district_col.aggregate(pipeline):
+        data.append({
+            "district": r["_id"],
+            "total": r["total"],
+            "working": r["working"],
+            "non_working": r["non_working"],
+            "mismatched": r.get("mismatched") or []
+        })
+
+    return jsonify(data)
+
+
+# ================= DAY-OVER-DAY CHANGES =================
+@app.route("/api/changes")
+def station_changes():
+    """?date= (or nothing, for the latest) returns one diff; ?from=&to=
+    returns every diff in the range, oldest first."""
+    station_type = request.args.get("type")
+    is_range = bool(request.args.get("from") or request.args.get("to"))
+    if not station_type:
+        return jsonify([] if is_range else {})
+
+    query = {"station_type": station_type}
+    projection = {"_id": 0, "created_at": 0}
+
+    if is_range or request.args.get("date"):
+        date_range = requested_range()
+        if not date_range:
+            return jsonify([] if is_range else {})
+        query["data_date"] = {"$gte": date_range[0], "$lt": date_range[1]}
+
+    if is_range:
+        docs = changes_col.find(query, projection).sort("data_date", 1)
+        return jsonify([change_doc(d) for d in docs])
+
+    # without a date, the latest computed diff
+    doc = changes_col.find_one(query, projection, sort=[("data_date", -1)])
+    return jsonify(change_doc(doc) if doc else {})
+
+
+def change_doc(doc):
+    doc["data_date"] = doc["data_date"].strftime("%Y-%m-%d")
+    if doc.get("previous_date"):
+        doc["previous_date"] = doc["previous_date"].strftime("%Y-%m-%d")
+    return doc
+
+
+# ================= STATION SEARCH =================
+@app.route("/api/search")
+def station_search_api():
+    q = request.args.get("q", "").strip()
+    station_type = request.args.get("type")
+    limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+
+    if len(q) < 2:
+        return jsonify([])
+
+    station_search.refresh()
+
+    data = []
+    for r in station_search.search(q, station_type, limit):
+        data.append({
+            "station_id": r["station_id"],
+            "station_type": r["station_type"],
+            "district": r.get("district"),
+            "block": r.get("block"),
+            "panchayat": r.get("panchayat"),
+            "vendor": r.get("vendor"),
+            "status": r.get("status"),
+            "data_date": r.get("data_date"),
+            "lat": r.get("latitude"),
+            "lon": r.get("longitude"),
+            "matched": r["matched"]
+        })
+
+    return jsonify(data)
+
+
 # ================= BLOCK FAULT =================
 @app.route("/api/block-fault")
 def block_fault():
     vendor = request.args.get("vendor")
     district = request.args.get("district")
     station_type = request.args.get("type")
-    date = request.args.get("date")
+    date_range = requested_range()
 
-    if not vendor or not district or not station_type or not date:
+    if not vendor or not district or not station_type or not date_range:
         return jsonify([])
 
-    rec_date = datetime.strptime(date, "%Y-%m-%d").strftime("%d-%m-%Y")
-
-    query = {
-        "station_type": station_type,
-        "recorded_time": rec_date,
-        "vendor": vendor,
-        "district": district,
-        "status": "NON-WORKING"
-    }
-
     data = []
-    for s in stations.find(query, {"_id": 0}):
-        f = s.get("fault_data", {})
+    for s in latest_rows(station_type, *date_range, {"vendor": vendor, "district": district}):
+        if s.get("status") != "NON-WORKING":
+            continue
+        f = s.get("fault", {})
         data.append({
+            "date": s["data_date"].strftime("%Y-%m-%d"),
             "block": s.get("block"),
             "station_id": s.get("station_id"),
             "temp_rh": f.get("temp_rh"),
@@ -334,6 +431,13 @@ if __name__ == "__main__":
     minute=0
     )
 
+    scheduler.add_job(
+    run_retention,
+    trigger="cron",
+    hour=2,
+    minute=0
+    )
+
     scheduler.start()
 
     atexit.register(lambda: scheduler.shutdown())
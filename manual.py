@@ -1,12 +1,13 @@
 import requests
-import csv
-from io import StringIO
 from datetime import datetime
 from pymongo import MongoClient
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import os
 from dotenv import load_dotenv
+from data_sync import store_district_summary, store_station_changes
+from station_store import ensure_indexes, store_station_rows, store_fault_rows, to_day
+from csv_schema import STATION_SCHEMA, FS_SCHEMA, HeaderDriftError, report_drift
 
 
 # LOAD ENV VARIABLES
@@ -21,35 +22,9 @@ BASE_URL = os.getenv("BASE_URL")          # faulty dashboard url
 client = MongoClient("mongodb://localhost:27017/")
 db = client["bmsk_dashboard"]
 
-stations_col = db["stations"]        # PRIMARY
 faulty_col = db["station_faults"]    # FS report (raw)
 
 
-# UTILS
-
-def safe_float(val):
-    try:
-        return float(val)
-    except:
-        return None
-
-
-def normalize_status(raw_status):
-    """
-    Normalize all status values into:
-    WORKING / NON-WORKING
-    """
-    if not raw_status:
-        return "WORKING"
-
-    raw_status = raw_status.strip().upper()
-
-    if raw_status in ["NOT WORKING", "NON WORKING", "NON-WORKING", "FAULTY"]:
-        return "NON-WORKING"
-
-    return "WORKING"
-
-
 # PART 1: FS REPORT (FAULTY SENSOR DATA)
 
 def get_date_directory(manual_date):
@@ -87,26 +62,23 @@ def get_csv_links(folder):
 
 def fetch_faulty_data(csv_url, data_date):
     res = requests.get(csv_url, timeout=15)
-    reader = csv.DictReader(StringIO(res.text))
+    try:
+        decoder, rows = FS_SCHEMA.read(res.text)
+    except HeaderDriftError as e:
+        print("CSV skipped:", csv_url, e)
+        return []
+    report_drift(decoder, csv_url)
+
+    source_file = csv_url.split("/")[-1]
+    day = to_day(data_date)
     fs_records = []
 
-    for row in reader:
-        fs = {
-            "station_id": row["STATION_ID"],
-            "temp_rh": row.get("TEMP.RH"),
-            "rf": row.get("RF"),
-            "ws": row.get("WS"),
-            "ap": row.get("AP"),
-            "sm": row.get("SM"),
-            "sr": row.get("SR"),
-            "data_pkt": row.get("DATA_PKT"),
-            "agency": row.get("Agency"),
-            "source_file": csv_url.split("/")[-1],
-            "data_date": data_date,
-        }
+    for fs in rows:
+        fs["source_file"] = source_file
+        fs["data_date"] = day
 
         faulty_col.update_one(
-            {"station_id": fs["station_id"], "data_date": data_date},
+            {"station_id": fs["station_id"], "data_date": fs["data_date"]},
             {"$set": fs},
             upsert=True
         )
@@ -144,49 +116,21 @@ def fetch_and_store_station_data(station_type, data_date):
         return
 
     res = requests.get(csv_url, timeout=15)
-    reader = csv.DictReader(StringIO(res.text))
-
-    for row in reader:
-        status = normalize_status(row.get("STATUS"))
-
-        doc = {
-            "station_id": row.get("STATION_NUMBER"),
-            "station_type": station_type,
-            "district": row.get("DISTRICT_NAME"),
-            "block": row.get("BLOCK_NAME"),
-            "panchayat": row.get("PANCHAYAT_NAME"),
-            "latitude": safe_float(row.get("LATITUDE")),
-            "longitude": safe_float(row.get("LONGITUDE")),
-            "vendor": row.get("VENDOR_NAME"),
-            "status": status,
-            "recorded_time": row.get("RECORDED_TIME"),
-            "data_date": data_date,
-            "created_at": datetime.utcnow()
-        }
-
-        stations_col.update_one(
-            {
-                "station_id": doc["station_id"],
-                "station_type": station_type,
-                "data_date": data_date
-            },
-            {"$set": doc},
-            upsert=True
-        )
+    try:
+        decoder, rows = STATION_SCHEMA.read(res.text)
+    except HeaderDriftError as e:
+        print("CSV skipped:", csv_url, e)
+        return
+    report_drift(decoder, csv_url)
+
+    # master attributes go to station_master, the day's status to station_status
+    store_station_rows(station_type, data_date, rows)
 
 
 # PART 3: MERGE FS DATA INTO NON-WORKING STATIONS
 
 def merge_fault_data(fs_records, data_date):
-    for fs in fs_records:
-        stations_col.update_many(
-            {
-                "station_id": fs["station_id"],
-                "status": "NON-WORKING",
-                "data_date": data_date
-            },
-            {"$set": {"fault_data": fs}}
-        )
+    store_fault_rows(data_date, fs_records)
 
 
 # MAIN
@@ -203,6 +147,8 @@ if __name__ == "__main__":
 
         print("🚀 STARTING DATA SYNC FOR DATE:", data_date)
 
+        ensure_indexes()
+
         #Station working / non-working
         fetch_and_store_station_data("AWS", data_date)
         fetch_and_store_station_data("ARG", data_date)
@@ -218,6 +164,14 @@ if __name__ == "__main__":
         #Merge FS into NON-WORKING
         merge_fault_data(fs_records, data_date)
 
+        #District aggregates for the map layer
+        store_district_summary("AWS", data_date)
+        store_district_summary("ARG", data_date)
+
+        #Day-over-day changes
+        store_station_changes("AWS", data_date)
+        store_station_changes("ARG", data_date)
+
         print("DATA SYNC COMPLETED SUCCESSFULLY")
 
     except Exception as e:
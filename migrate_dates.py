@@ -0,0 +1,33 @@
+# migrate_dates.py
+# One-off: convert "%Y-%m-%d" string dates written by earlier syncs into BSON
+# datetimes so they sort correctly and can be range-scanned.
+#
+#   python migrate_dates.py
+from station_store import db, ensure_indexes
+
+DATE_FIELDS = {
+    "station_status": ("data_date",),
+    "district_summary": ("data_date",),
+    "station_master": ("valid_from", "first_seen"),
+    "station_master_history": ("valid_from", "valid_to"),
+    "station_faults": ("data_date",),
+    "stations": ("data_date",),   # legacy, kept until migrate_station_master has run
+}
+
+
+def migrate_field(col, field):
+    # server-side conversion, only touches documents still holding a string
+    res = col.update_many(
+        {field: {"$type": "string"}},
+        [{"$set": {field: {"$dateFromString": {"dateString": f"${field}", "format": "%Y-%m-%d"}}}}]
+    )
+    return res.modified_count
+
+
+if __name__ == "__main__":
+    for name, fields in DATE_FIELDS.items():
+        for field in fields:
+            print(f"{name}.{field}: {migrate_field(db[name], field)} converted")
+
+    ensure_indexes()
+    print("DATE MIGRATION DONE")
@@ -0,0 +1,100 @@
+# migrate_station_master.py
+# One-off: split the legacy `stations` collection (a full station document per
+# day) into station_master + station_status, then compare storage and scan time.
+#
+#   python migrate_station_master.py            migrate, then compare
+#   python migrate_station_master.py compare    compare only
+import sys, time
+from datetime import datetime
+from station_store import (
+    db, meta_col, ensure_indexes, store_station_rows, store_fault_rows, day_rows,
+    to_day, MASTER_FIELDS, MIGRATION_META_ID
+)
+
+legacy_col = db["stations"]
+
+
+# ================= MIGRATION =================
+def migrate():
+    ensure_indexes()
+
+    # oldest first, so master change tracking replays in the right order
+    dates = sorted(d for d in legacy_col.distinct("data_date") if d)
+
+    for date in dates:
+        for station_type in legacy_col.distinct("station_type", {"data_date": date}):
+            rows = legacy_col.find(
+                {"station_type": station_type, "data_date": date},
+                {"_id": 0, "station_id": 1, "status": 1, **{f: 1 for f in MASTER_FIELDS}}
+            )
+            res = store_station_rows(station_type, date, rows)
+            print(date, station_type, res)
+
+        faults = [
+            {**d["fault_data"], "station_id": d["station_id"]}
+            for d in legacy_col.find(
+                {"data_date": date, "fault_data": {"$exists": True}},
+                {"_id": 0, "station_id": 1, "fault_data": 1}
+            )
+        ]
+        store_fault_rows(date, faults)
+
+    # retention.py only archives legacy days up to this marker
+    meta_col.update_one(
+        {"_id": MIGRATION_META_ID},
+        {"$set": {"completed_at": datetime.utcnow(), "through": to_day(dates[-1]) if dates else None, "days": len(dates)}},
+        upsert=True
+    )
+    print("Migrated", len(dates), "days. Legacy `stations` collection left in place.")
+
+
+# ================= COMPARISON =================
+def coll_stats(name):
+    try:
+        st = db.command("collStats", name)
+    except Exception:
+        return {"count": 0, "size": 0, "storage": 0, "indexes": 0}
+    return {
+        "count": st.get("count", 0),
+        "size": st.get("size", 0),
+        "storage": st.get("storageSize", 0),
+        "indexes": st.get("totalIndexSize", 0)
+    }
+
+
+def best_time(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def compare():
+    old = coll_stats("stations")
+    new = {k: 0 for k in old}
+    for name in ("station_master", "station_master_history", "station_status"):
+        for k, v in coll_stats(name).items():
+            new[k] += v
+
+    print(f"{'':12}{'docs':>12}{'data':>14}{'storage':>14}{'indexes':>14}")
+    print(f"{'legacy':12}{old['count']:>12}{old['size']:>14}{old['storage']:>14}{old['indexes']:>14}")
+    print(f"{'normalized':12}{new['count']:>12}{new['size']:>14}{new['storage']:>14}{new['indexes']:>14}")
+
+    dates = legacy_col.distinct("data_date")
+    if not dates:
+        return
+    date = max(dates)
+
+    for station_type in ("AWS", "ARG"):
+        t_old = best_time(lambda: list(legacy_col.find({"station_type": station_type, "data_date": date}, {"_id": 0})))
+        t_new = best_time(lambda: list(day_rows(station_type, date)))
+        print(f"{station_type} {date} day scan: legacy {t_old * 1000:.1f} ms, normalized {t_new * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "compare":
+        migrate()
+    compare()
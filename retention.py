@@ -0,0 +1,206 @@
+# retention.py
+# Keep the last RETENTION_HOT_DAYS days of station_status in full; compact
+# older days into per-station monthly buckets (station_status_monthly), and
+# move old raw FS rows / legacy station snapshots to gzip files on disk
+# (the latter only once migrate_station_master.py has copied them).
+#
+#   python retention.py              dry run: report what would be reclaimed
+#   python retention.py apply        compact and delete
+#   python retention.py apply 30     ... keeping 30 hot days
+import os, sys, gzip, itertools
+from datetime import datetime, timedelta
+from bson import BSON, json_util
+from pymongo import UpdateOne
+from station_store import (
+    db, status_col, monthly_col, meta_col, ensure_indexes, to_day, month_start, MIGRATION_META_ID,
+    reset_archive_cutoff
+)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARCHIVE_DIR = os.path.join(BASE_DIR, "archive")
+
+HOT_DAYS = int(os.getenv("RETENTION_HOT_DAYS", "90"))
+BATCH = 1000
+
+# collections nothing reads any more; old rows go to disk instead of buckets
+FILE_ARCHIVED = ("station_faults",)
+
+# legacy per-day snapshots: only days migrate_station_master.py has copied
+LEGACY_STATIONS = "stations"
+
+
+# ================= UTILS =================
+def bytes_older_than(col, cutoff):
+    pipeline = [
+        {"$match": {"data_date": {"$lt": cutoff}}},
+        {"$group": {"_id": None, "docs": {"$sum": 1}, "bytes": {"$sum": {"$bsonSize": "$$ROOT"}}}}
+    ]
+    r = next(col.aggregate(pipeline), None)
+    return (r["docs"], r["bytes"]) if r else (0, 0)
+
+
+def delete_ids(col, ids):
+    for i in range(0, len(ids), BATCH):
+        col.delete_many({"_id": {"$in": ids[i:i + BATCH]}})
+
+
+def next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def months_before(col, cutoff):
+    """[start, end) windows of one calendar month, oldest first, up to `cutoff`.
+
+    Each job step only holds one month of documents in memory.
+    """
+    first = col.find_one({"data_date": {"$lt": cutoff, "$type": "date"}}, {"data_date": 1}, sort=[("data_date", 1)])
+    if not first:
+        return
+    start = month_start(first["data_date"])
+    while start < cutoff:
+        end = min(next_month(start), cutoff)
+        yield start, end
+        start = end
+
+
+class ByteCounter:
+    """Write-only sink that counts bytes; stands in for the archive file on dry runs."""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, b):
+        self.size += len(b)
+        return len(b)
+
+    def tell(self):
+        return self.size
+
+    def flush(self):
+        pass
+
+
+# ================= HOT -> MONTHLY BUCKETS =================
+def compact_month(start, end, dry_run=True):
+    """Fold one month of hot facts into buckets; returns the bucket bytes written."""
+    buckets = {}
+    ids = []
+
+    for f in status_col.find({"data_date": {"$gte": start, "$lt": end}}):
+        ids.append(f["_id"])
+        key = (f["station_type"], f["station_id"], month_start(f["data_date"]))
+        day = {"s": f.get("status")}
+        if f.get("fault"):
+            day["f"] = f["fault"]
+        buckets.setdefault(key, {})[str(f["data_date"].day)] = day
+
+    added = 0
+    ops = []
+    for (station_type, station_id, month), days in buckets.items():
+        added += len(BSON.encode({"station_type": station_type, "station_id": station_id, "month": month, "days": days}))
+        ops.append(UpdateOne(
+            {"station_type": station_type, "station_id": station_id, "month": month},
+            {"$set": {f"days.{d}": v for d, v in days.items()}},
+            upsert=True
+        ))
+
+    if not dry_run and ops:
+        for i in range(0, len(ops), BATCH):
+            monthly_col.bulk_write(ops[i:i + BATCH], ordered=False)
+        # readers switch to the buckets before the hot rows disappear
+        set_cutoff(end)
+        delete_ids(status_col, ids)
+
+    return added
+
+
+def compact_status(cutoff, dry_run=True):
+    docs, freed = bytes_older_than(status_col, cutoff)
+    added = 0
+    for start, end in months_before(status_col, cutoff):
+        added += compact_month(start, end, dry_run)
+    return {"collection": "station_status", "docs": docs, "freed": freed, "added": added}
+
+
+def set_cutoff(cutoff):
+    meta = meta_col.find_one({"_id": "retention"})
+    if meta and meta.get("cutoff") and meta["cutoff"] >= cutoff:
+        return
+    meta_col.update_one({"_id": "retention"}, {"$set": {"cutoff": cutoff}}, upsert=True)
+    # reads in this process (the job runs inside index.py) see it before the delete
+    reset_archive_cutoff()
+
+
+# ================= RAW ROWS -> FILES =================
+def archive_month(col, out_dir, start, end, dry_run=True):
+    """Stream one month of `col` into a gzip member; returns its compressed size."""
+    cursor = col.find({"data_date": {"$gte": start, "$lt": end, "$type": "date"}}).sort("data_date", 1)
+    first = next(cursor, None)
+    if first is None:
+        return 0
+
+    if dry_run:
+        sink = ByteCounter()
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+        # appended gzip members read back as one stream
+        sink = open(os.path.join(out_dir, f"{start:%Y-%m}.jsonl.gz"), "ab")
+
+    ids = []
+    try:
+        before = sink.tell()
+        with gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=9, mtime=0) as gz:
+            for d in itertools.chain([first], cursor):
+                gz.write((json_util.dumps(d) + "\n").encode("utf-8"))
+                ids.append(d["_id"])
+        added = sink.tell() - before
+    finally:
+        if not dry_run:
+            sink.close()
+
+    if not dry_run:
+        delete_ids(col, ids)
+    return added
+
+
+def archive_to_files(name, cutoff, dry_run=True):
+    col = db[name]
+    docs, freed = bytes_older_than(col, cutoff)
+    out_dir = os.path.join(ARCHIVE_DIR, name)
+
+    added = 0
+    for start, end in months_before(col, cutoff):
+        added += archive_month(col, out_dir, start, end, dry_run)
+
+    return {"collection": name, "docs": docs, "freed": freed, "added": added}
+
+
+# ================= JOB =================
+def run_retention(hot_days=HOT_DAYS, dry_run=False):
+    cutoff = to_day(datetime.utcnow()) - timedelta(days=hot_days)
+    print("RETENTION", "DRY RUN" if dry_run else "START", "- compacting before", cutoff.date())
+
+    ensure_indexes()
+    report = [compact_status(cutoff, dry_run)]
+    for name in FILE_ARCHIVED:
+        report.append(archive_to_files(name, cutoff, dry_run))
+
+    legacy = legacy_cutoff(cutoff)
+    if legacy:
+        report.append(archive_to_files(LEGACY_STATIONS, legacy, dry_run))
+    else:
+        print(f"skipping `{LEGACY_STATIONS}`: migrate_station_master.py has not completed")
+
+    print(f"{'collection':24}{'docs':>10}{'freed':>14}{'added':>14}{'net':>14}")
+    for r in report:
+        net = r["freed"] - r["added"]
+        print(f"{r['collection']:24}{r['docs']:>10}{r['freed']:>14}{r['added']:>14}{net:>14}")
+    print("bytes are BSON document sizes; index and file-system overhead not included")
+
+    return report
+
+
+if __name__ == "__main__":
+    apply = len(sys.argv) > 1 and sys.argv[1] == "apply"
+    hot_days = int(sys.argv[2]) if len(sys.argv) > 2 else HOT_DAYS
+    run_retention(hot_days, dry_run=not apply)
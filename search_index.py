@@ -0,0 +1,161 @@
+# search_index.py
+# In-memory prefix index over station_master for /api/search. Built once,
+# then patched with the master documents the sync added or changed.
+import time, threading
+from bisect import bisect_left, insort
+from station_store import master_col, status_col, master_version, MASTER_FIELDS
+
+# lower rank wins; a station matched through several terms keeps its best
+FIELD_RANK = {"station_id": 0, "panchayat": 1, "block": 2, "district": 3}
+FIELD_RANK_NAMES = {rank: field for field, rank in FIELD_RANK.items()}
+
+REFRESH_TTL = 30       # seconds between master version checks
+MAX_SCAN = 5000        # prefix entries looked at per query
+FULL_REBUILD_SHARE = 0.2
+
+
+def normalize(text):
+    return " ".join(str(text).lower().split()) if text else ""
+
+
+def station_terms(m):
+    """(term, field) pairs for one master doc: each field's full value, plus
+    every later word so "nagar" finds "ram nagar"."""
+    terms = set()
+    for field in FIELD_RANK:
+        value = normalize(m.get(field))
+        if not value:
+            continue
+        terms.add((value, field))
+        words = value.split(" ")
+        for i in range(1, len(words)):
+            terms.add((" ".join(words[i:]), field))
+    return terms
+
+
+class StationSearch:
+    def __init__(self):
+        self.keys = []         # sorted (term, rank, station_type, station_id)
+        self.stations = {}     # (station_type, station_id) -> master attributes
+        self.terms = {}        # (station_type, station_id) -> its keys, for removal
+        self.version = None
+        self.high_water = None
+        self.checked = None
+        self.lock = threading.Lock()
+
+    # ================= BUILD =================
+    def _entries(self, key, m):
+        return [(term, FIELD_RANK[field], key[0], key[1]) for term, field in station_terms(m)]
+
+    def _put(self, m, bulk=False):
+        key = (m["station_type"], m["station_id"])
+        self.stations[key] = {f: m.get(f) for f in MASTER_FIELDS}
+        entries = self._entries(key, m)
+        self.terms[key] = entries
+        if bulk:
+            self.keys.extend(entries)
+        else:
+            for e in entries:
+                insort(self.keys, e)
+
+    def _remove(self, key):
+        for e in self.terms.pop(key, []):
+            i = bisect_left(self.keys, e)
+            if i < len(self.keys) and self.keys[i] == e:
+                del self.keys[i]
+        self.stations.pop(key, None)
+
+    def _track(self, m):
+        ts = m.get("updated_at")
+        if ts and (self.high_water is None or ts > self.high_water):
+            self.high_water = ts
+
+    def rebuild(self):
+        self.keys, self.stations, self.terms, self.high_water = [], {}, {}, None
+        for m in master_col.find({}, {"_id": 0}):
+            self._put(m, bulk=True)
+            self._track(m)
+        self.keys.sort()
+
+    def refresh(self, force=False):
+        """Bring the index up to date with station_master.
+
+        Cheap when nothing changed: one version lookup every REFRESH_TTL.
+        """
+        now = time.monotonic()
+        if not force and self.checked is not None and now - self.checked < REFRESH_TTL:
+            return
+
+        with self.lock:
+            self.checked = now
+            version = master_version()
+            if version == self.version and not force:
+                return
+
+            if self.high_water is None:
+                self.rebuild()
+            else:
+                changed = list(master_col.find({"updated_at": {"$gte": self.high_water}}, {"_id": 0}))
+                if len(changed) > FULL_REBUILD_SHARE * max(len(self.stations), 1):
+                    self.rebuild()
+                else:
+                    for m in changed:
+                        self._remove((m["station_type"], m["station_id"]))
+                        self._put(m)
+                        self._track(m)
+            self.version = version
+
+    # ================= QUERY =================
+    def search(self, q, station_type=None, limit=10):
+        q = normalize(q)
+        if not q:
+            return []
+
+        best = {}
+        with self.lock:
+            i = bisect_left(self.keys, (q,))
+            end = min(len(self.keys), i + MAX_SCAN)
+            while i < end and self.keys[i][0].startswith(q):
+                term, rank, t, sid = self.keys[i]
+                i += 1
+                if station_type and t != station_type:
+                    continue
+                # exact term beats a longer term sharing the prefix
+                score = (rank, term != q, len(term))
+                key = (t, sid)
+                if key not in best or score < best[key][0]:
+                    best[key] = (score, rank)
+            ranked = sorted(best.items(), key=lambda kv: (kv[1][0], kv[0][1]))[:limit]
+            results = [
+                {"station_type": t, "station_id": sid, "matched": FIELD_RANK_NAMES[rank], **self.stations[(t, sid)]}
+                for (t, sid), (_, rank) in ranked
+            ]
+
+        return attach_status(results)
+
+
+def attach_status(results):
+    """Latest known status for each result: one indexed query per station type."""
+    by_type = {}
+    for r in results:
+        by_type.setdefault(r["station_type"], []).append(r)
+
+    for station_type, rows in by_type.items():
+        latest = status_col.find_one({"station_type": station_type}, {"_id": 0, "data_date": 1}, sort=[("data_date", -1)])
+        if not latest:
+            continue
+        status = {
+            s["station_id"]: s.get("status")
+            for s in status_col.find(
+                {"station_type": station_type, "data_date": latest["data_date"], "station_id": {"$in": [r["station_id"] for r in rows]}},
+                {"_id": 0, "station_id": 1, "status": 1}
+            )
+        }
+        for r in rows:
+            r["status"] = status.get(r["station_id"])
+            r["data_date"] = latest["data_date"].strftime("%Y-%m-%d")
+
+    return results
+
+
+station_search = StationSearch()
@@ -4,6 +4,8 @@ let markers = [];
 let pieChart = null;
 let selectedDistrict = null;
 let selectedVendor = null;
+let districtLayer = null;
+let districtShapes = {};
 
 
 
@@ -98,8 +100,79 @@ function loadData() {
     });
 
   loadVendorTable();
+  loadDistrictLayer();
 }
 
+/* ================= DISTRICT CHOROPLETH ================= */
+function geoLevel() {
+  const z = map.getZoom();
+  return z < 8 ? "low" : z < 10 ? "medium" : "high";
+}
+
+function districtColor(d) {
+  if (!d || !d.total) return "#cccccc";
+  const share = d.non_working / d.total;
+  return share > 0.5
+    ? "#b30000"
+    : share > 0.3
+    ? "#e34a33"
+    : share > 0.15
+    ? "#fc8d59"
+    : share > 0.05
+    ? "#fdcc8a"
+    : "#9bd39b";
+}
+
+function loadGeo(level) {
+  if (districtShapes[level]) return Promise.resolve(districtShapes[level]);
+  const url =
+    (window.DISTRICT_LAYERS || {})[level] || `/api/geo/districts?level=${level}`;
+  return fetch(url)
+    .then((r) => (r.ok ? r.json() : null))
+    .then((g) => (districtShapes[level] = g));
+}
+
+function loadDistrictLayer() {
+  Promise.all([
+    loadGeo(geoLevel()),
+    fetch(
+      `/api/district-summary?type=${currentType}&date=${datePicker.value}`
+    ).then((r) => r.json()),
+  ]).then(([geo, rows]) => {
+    if (districtLayer) map.removeLayer(districtLayer);
+    districtLayer = null;
+    if (!geo) return;
+
+    const byDistrict = {};
+    rows.forEach((d) => (byDistrict[d.district] = d));
+
+    districtLayer = L.geoJSON(geo, {
+      style: (f) => ({
+        color: "#555",
+        weight: 1,
+        fillOpacity: 0.35,
+        fillColor: districtColor(byDistrict[f.properties.district]),
+      }),
+      onEachFeature: (f, layer) => {
+        const d = byDistrict[f.properties.district];
+        layer.bindTooltip(
+          d
+            ? `${f.properties.district}<br>Working: ${d.working}<br>Not Working: ${d.non_working}`
+            : f.properties.district
+        );
+      },
+    }).addTo(map);
+    districtLayer.bringToBack();
+  });
+}
+
+let lastGeoLevel = geoLevel();
+map.on("zoomend", () => {
+  if (geoLevel() === lastGeoLevel) return;
+  lastGeoLevel = geoLevel();
+  loadDistrictLayer();
+});
+
 /* ================= VENDOR TABLE ================= */
 function loadVendorTable() {
   fetch(`/api/vendor-summary?type=${currentType}&date=${datePicker.value}`)
@@ -363,6 +436,11 @@ function printBlockReport() {
   const reportDate = datePicker.value; // yyyy-mm-dd
   const reportType = currentType; // ARG / AWS
   const reportAgency = selectedVendor;
+  // fingerprinted URLs from the template, so the logos come from cache
+  const reportImages = window.REPORT_IMAGES || {
+    bmsk: "/static/image/image.png",
+    bihar: "/static/image/image1.png",
+  };
 
   const printWindow = window.open("", "", "width=900,height=650");
 
@@ -435,9 +513,9 @@ function printBlockReport() {
       <body>
         <div class="navbar">
           <div class="navElement">
-            <div class="logo_bmsk"><img src="../static/image/image.png"></div>
+            <div class="logo_bmsk"><img src="${reportImages.bmsk}"></div>
             <div class="navHead">BIHAR MAUSAM SEWA KENDRA </div>
-            <div class="logo_bihar"><img src="../static/image/image1.png"></div>
+            <div class="logo_bihar"><img src="${reportImages.bihar}"></div>
           </div>
         </div>
         <h2>District Block-wise Fault Report</h2>
@@ -562,6 +640,60 @@ function loadBlockFault(vendor, district) {
 
 
 
+/* ================= STATION SEARCH ================= */
+let searchTimer = null;
+
+function showStation(s) {
+  searchResults.innerHTML = "";
+  stationSearch.value = s.station_id;
+  if (!s.lat || !s.lon) return;
+
+  map.setView([s.lat, s.lon], 13);
+  L.popup()
+    .setLatLng([s.lat, s.lon])
+    .setContent(
+      `
+      Station: ${s.station_id} (${s.station_type})<br>
+      Status: ${s.status ?? "NA"}<br>
+      District: ${s.district}<br>
+      Block: ${s.block}<br>
+      Panchayat: ${s.panchayat}
+    `
+    )
+    .openOn(map);
+}
+
+stationSearch.oninput = () => {
+  clearTimeout(searchTimer);
+  const q = stationSearch.value.trim();
+
+  if (q.length < 2) {
+    searchResults.innerHTML = "";
+    return;
+  }
+
+  searchTimer = setTimeout(() => {
+    fetch(`/api/search?q=${encodeURIComponent(q)}&type=${currentType}`)
+      .then((r) => r.json())
+      .then((rows) => {
+        searchResults.innerHTML = "";
+
+        rows.forEach((s) => {
+          const li = document.createElement("li");
+          li.innerHTML = `
+            <b>${s.station_id}</b>
+            <span class="${s.status === "WORKING" ? "status-working" : "status-not-working"}">
+              ${s.status ?? ""}
+            </span><br>
+            ${s.panchayat ?? ""}, ${s.block ?? ""}, ${s.district ?? ""}
+          `;
+          li.onclick = () => showStation(s);
+          searchResults.appendChild(li);
+        });
+      });
+  }, 150);
+};
+
 /* ================= BUTTON EVENTS ================= */
 awsBtn.onclick = () => {
   currentType = "AWS";
@@ -0,0 +1,396 @@
+# station_store.py
+import time
+from bisect import bisect_right
+from datetime import datetime, date, timedelta
+from pymongo import MongoClient, UpdateOne, UpdateMany, ASCENDING
+
+client = MongoClient("mongodb://localhost:27017/")
+db = client["bmsk_dashboard"]
+
+master_col = db["station_master"]              # one doc per station (dimension)
+master_history_col = db["station_master_history"]  # superseded master versions
+status_col = db["station_status"]              # one slim doc per station per day (fact)
+meta_col = db["sync_meta"]
+district_col = db["district_summary"]          # per-district daily aggregates
+changes_col = db["station_changes"]            # day-over-day status diff per type
+monthly_col = db["station_status_monthly"]     # compacted facts, one doc per station per month
+
+MASTER_FIELDS = ("district", "block", "panchayat", "latitude", "longitude", "vendor")
+FAULT_FIELDS = ("temp_rh", "rf", "ws", "ap", "sm", "sr", "data_pkt", "agency")
+
+MIGRATION_META_ID = "station_master_migration"  # sync_meta marker written by migrate_station_master.py
+
+MASTER_CACHE_TTL = 30  # seconds between version checks
+RETENTION_CACHE_TTL = 60
+
+
+# ================= DATES =================
+def to_day(value):
+    """Midnight datetime for a "%Y-%m-%d" string, date or datetime."""
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def day_range(value):
+    start = to_day(value)
+    return start, start + timedelta(days=1)
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+# ================= INDEXES =================
+def ensure_indexes():
+    master_col.create_index([("station_type", ASCENDING), ("station_id", ASCENDING)], unique=True)
+    master_col.create_index([("updated_at", ASCENDING)])
+    master_history_col.create_index([("station_type", ASCENDING), ("station_id", ASCENDING), ("version", ASCENDING)])
+    status_col.create_index(
+        [("station_type", ASCENDING), ("data_date", ASCENDING), ("station_id", ASCENDING)],
+        unique=True
+    )
+    status_col.create_index([("station_id", ASCENDING), ("data_date", ASCENDING)])
+    district_col.create_index(
+        [("station_type", ASCENDING), ("data_date", ASCENDING), ("district", ASCENDING)],
+        unique=True
+    )
+    changes_col.create_index([("station_type", ASCENDING), ("data_date", ASCENDING)], unique=True)
+    monthly_col.create_index(
+        [("station_type", ASCENDING), ("month", ASCENDING), ("station_id", ASCENDING)],
+        unique=True
+    )
+
+
+# ================= WRITE =================
+def store_station_rows(station_type, data_date, rows):
+    """Write one day of station rows.
+
+    Each row carries station_id, status and any of MASTER_FIELDS. The master
+    document is only rewritten when an attribute changes; the old version is
+    copied to station_master_history first.
+    """
+    data_date = to_day(data_date)
+    master = {m["station_id"]: m for m in master_col.find({"station_type": station_type})}
+    now = datetime.utcnow()
+
+    master_ops = []
+    history = []
+    facts = []
+
+    for r in rows:
+        sid = r.get("station_id")
+        if not sid:
+            continue
+
+        key = {"station_id": sid, "station_type": station_type}
+        # a missing value in one day's file doesn't erase what we already know
+        attrs = {f: r[f] for f in MASTER_FIELDS if r.get(f) is not None}
+        cur = master.get(sid)
+
+        if cur is None:
+            master_ops.append(UpdateOne(
+                key,
+                {"$set": {**attrs, "version": 1, "valid_from": data_date, "updated_at": now},
+                 "$setOnInsert": {"first_seen": data_date}},
+                upsert=True
+            ))
+            master[sid] = {**key, **attrs, "version": 1, "valid_from": data_date}
+
+        elif data_date >= cur.get("valid_from", data_date) and any(cur.get(f) != v for f, v in attrs.items()):
+            history.append({
+                **key,
+                **{f: cur.get(f) for f in MASTER_FIELDS},
+                "version": cur.get("version", 1),
+                "valid_from": cur.get("valid_from"),
+                "valid_to": data_date,
+                "replaced_at": now
+            })
+            master_ops.append(UpdateOne(
+                key,
+                {"$set": {**attrs, "valid_from": data_date, "updated_at": now}, "$inc": {"version": 1}}
+            ))
+            master[sid] = {**cur, **attrs, "version": cur.get("version", 1) + 1, "valid_from": data_date}
+
+        update = {"$set": {"status": r.get("status")}}
+        if r.get("status") != "NON-WORKING":
+            # a re-synced day that recovered must not keep the old fault detail
+            update["$unset"] = {"fault": ""}
+        facts.append(UpdateOne(
+            {"station_id": sid, "station_type": station_type, "data_date": data_date},
+            update,
+            upsert=True
+        ))
+
+    if history:
+        master_history_col.insert_many(history)
+    if master_ops:
+        master_col.bulk_write(master_ops, ordered=False)
+        meta_col.update_one({"_id": "station_master"}, {"$inc": {"version": 1}}, upsert=True)
+        # this process reads its own writes at once; others see them after MASTER_CACHE_TTL
+        _master_cache.pop(station_type, None)
+        _history_cache.pop(station_type, None)
+    if facts:
+        status_col.bulk_write(facts, ordered=False)
+
+    return {"stations": len(facts), "master_changes": len(master_ops)}
+
+
+def store_fault_rows(data_date, fs_records):
+    data_date = to_day(data_date)
+    ops = [
+        UpdateMany(
+            {"station_id": fs["station_id"], "data_date": data_date, "status": "NON-WORKING"},
+            {"$set": {"fault": {f: fs.get(f) for f in FAULT_FIELDS}}}
+        )
+        for fs in fs_records
+        if fs.get("station_id")
+    ]
+    if ops:
+        status_col.bulk_write(ops, ordered=False)
+
+
+# ================= READ =================
+_master_cache = {}
+_history_cache = {}
+
+
+def master_version():
+    meta = meta_col.find_one({"_id": "station_master"})
+    return meta["version"] if meta else 0
+
+
+def _versioned(cache, station_type, load):
+    """Cached load(station_type), reloaded once the master version moves."""
+    entry = cache.get(station_type)
+    now = time.monotonic()
+
+    if entry and now - entry["checked"] < MASTER_CACHE_TTL:
+        return entry["data"]
+
+    version = master_version()
+    if entry and entry["version"] == version:
+        entry["checked"] = now
+        return entry["data"]
+
+    data = load(station_type)
+    cache[station_type] = {"version": version, "checked": now, "data": data}
+    return data
+
+
+def _load_master(station_type):
+    projection = {"_id": 0, "station_id": 1, "valid_from": 1, **{f: 1 for f in MASTER_FIELDS}}
+    return {m["station_id"]: m for m in master_col.find({"station_type": station_type}, projection)}
+
+
+def _load_history(station_type):
+    history = {}
+    projection = {"_id": 0, "station_id": 1, "valid_from": 1, "valid_to": 1, **{f: 1 for f in MASTER_FIELDS}}
+    for h in master_history_col.find({"station_type": station_type}, projection).sort("version", ASCENDING):
+        starts, versions = history.setdefault(h.pop("station_id"), ([], []))
+        # migrated masters may predate valid_from; their first version covers all earlier days
+        starts.append(h.get("valid_from") or datetime.min)
+        versions.append(h)
+    return history
+
+
+def get_master(station_type):
+    """station_id -> current master doc, cached in-process until the master changes."""
+    return _versioned(_master_cache, station_type, _load_master)
+
+
+def get_history(station_type):
+    """station_id -> (valid_from list, superseded versions), oldest first."""
+    return _versioned(_history_cache, station_type, _load_history)
+
+
+def master_as_of(m, history, data_date):
+    """The version of master doc `m` that was in effect on `data_date`."""
+    entry = history.get(m.get("station_id"))
+    if not entry or data_date >= (m.get("valid_from") or data_date):
+        return m
+    starts, versions = entry
+    i = bisect_right(starts, data_date) - 1
+    if i >= 0 and data_date < versions[i]["valid_to"]:
+        return {**m, **versions[i]}
+    # older than any recorded version: the earliest attributes we know of
+    return m
+
+
+_retention_cache = {"checked": None, "cutoff": None}
+
+
+def archive_cutoff():
+    """Days before this datetime live only in station_status_monthly."""
+    now = time.monotonic()
+    if _retention_cache["checked"] is None or now - _retention_cache["checked"] > RETENTION_CACHE_TTL:
+        meta = meta_col.find_one({"_id": "retention"})
+        _retention_cache["cutoff"] = meta.get("cutoff") if meta else None
+        _retention_cache["checked"] = now
+    return _retention_cache["cutoff"]
+
+
+def reset_archive_cutoff():
+    """Forget the cached cutoff; the retention job calls this when it moves."""
+    _retention_cache["checked"] = None
+
+
+def split_range(start, end):
+    """Split [start, end) into (archived, hot) sub-ranges; either may be None."""
+    cutoff = archive_cutoff()
+    if not cutoff:
+        return None, (start, end)
+    archived = (start, min(end, cutoff)) if start < cutoff else None
+    hot = (max(start, cutoff), end) if end > cutoff else None
+    return archived, hot
+
+
+def archived_facts(station_type, start, end, query=None):
+    """Facts in [start, end) expanded from monthly buckets, oldest first."""
+    facts = []
+    buckets = monthly_col.find({
+        "station_type": station_type,
+        "month": {"$gte": month_start(start), "$lt": end}
+    })
+
+    for b in buckets:
+        for day, v in b["days"].items():
+            data_date = b["month"].replace(day=int(day))
+            if not start <= data_date < end:
+                continue
+            fact = {"station_id": b["station_id"], "data_date": data_date, "status": v.get("s")}
+            if v.get("f"):
+                fact["fault"] = v["f"]
+            if query and any(fact.get(k) != val for k, val in query.items()):
+                continue
+            facts.append(fact)
+
+    facts.sort(key=lambda f: f["data_date"])
+    return facts
+
+
+def status_rows(station_type, start, end, query=None, master_filter=None):
+    """Status facts in [start, end) joined with their station master attributes.
+
+    Each fact gets the master version valid on its own day, so a station that
+    moved district or vendor is reported where it was at the time; `master_filter`
+    matches those point-in-time attributes.
+
+    The hot part is a range scan on the (station_type, data_date, station_id)
+    index; days older than the retention cutoff come from monthly buckets.
+    """
+    master = get_master(station_type)
+    history = get_history(station_type)
+    archived, hot = split_range(start, end)
+
+    sources = []
+    if archived:
+        sources.append(archived_facts(station_type, *archived, query))
+    if hot:
+        q = {"station_type": station_type, "data_date": {"$gte": hot[0], "$lt": hot[1]}}
+        if query:
+            q.update(query)
+        projection = {"_id": 0, "station_id": 1, "data_date": 1, "status": 1, "fault": 1}
+        sources.append(status_col.find(q, projection).sort("data_date", ASCENDING))
+
+    for facts in sources:
+        for fact in facts:
+            row = _join(master, history, fact, master_filter)
+            if row is not None:
+                yield row
+
+
+def _join(master, history, fact, master_filter=None):
+    """`fact` merged with its point-in-time master, or None if filtered out."""
+    m = master.get(fact["station_id"])
+    m = master_as_of(m, history, fact["data_date"]) if m else {}
+    if master_filter and any(m.get(k) != v for k, v in master_filter.items()):
+        return None
+    row = {**m, **fact}
+    row.pop("valid_from", None)
+    row.pop("valid_to", None)
+    return row
+
+
+def latest_facts(station_type, start, end, fields=("status", "fault")):
+    """station_id -> its last fact in [start, end).
+
+    The hot tier is reduced to one document per station inside Mongo ($sort on
+    the data_date index, then $group/$last), so a long range costs one row
+    per station on the wire rather than one per station-day.
+    """
+    archived, hot = split_range(start, end)
+    latest = {}
+
+    if archived:
+        for fact in archived_facts(station_type, *archived):
+            latest[fact["station_id"]] = fact
+
+    if hot:
+        pipeline = [
+            {"$match": {
+                "station_type": station_type,
+                "data_date": {"$gte": hot[0], "$lt": hot[1]}
+            }},
+            {"$sort": {"data_date": 1}},
+            {"$group": {
+                "_id": "$station_id",
+                "data_date": {"$last": "$data_date"},
+                **{f: {"$last": f"${f}"} for f in fields}
+            }}
+        ]
+        # hot days are newer than archived ones, so they win
+        for r in status_col.aggregate(pipeline):
+            sid = r.pop("_id")
+            latest[sid] = {"station_id": sid, **{k: v for k, v in r.items() if v is not None}}
+
+    return latest
+
+
+def latest_rows(station_type, start, end, master_filter=None):
+    """Each station's last row in [start, end), i.e. its status as of the end
+    of the range, joined with the master version valid that day.
+    `master_filter` is matched against that row."""
+    master = get_master(station_type)
+    history = get_history(station_type)
+
+    rows = []
+    for fact in latest_facts(station_type, start, end).values():
+        row = _join(master, history, fact, master_filter)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def status_counts(station_type, start, end):
+    """status -> number of stations whose latest status in [start, end) it is."""
+    counts = {}
+    for fact in latest_facts(station_type, start, end, fields=("status",)).values():
+        status = fact.get("status")
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def previous_date(station_type, data_date):
+    """Latest day before `data_date` that has status facts, or None."""
+    prev = status_col.find_one(
+        {"station_type": station_type, "data_date": {"$lt": to_day(data_date)}},
+        {"_id": 0, "data_date": 1},
+        sort=[("data_date", -1)]
+    )
+    return prev["data_date"] if prev else None
+
+
+def day_statuses(station_type, data_date):
+    """(station_id, status) for one day, in station_id order straight off the index."""
+    cursor = status_col.find(
+        {"station_type": station_type, "data_date": to_day(data_date)},
+        {"_id": 0, "station_id": 1, "status": 1}
+    ).sort("station_id", ASCENDING)
+    for s in cursor:
+        yield s["station_id"], s.get("status")
+
+
+def day_rows(station_type, data_date, query=None, master_filter=None):
+    start, end = day_range(data_date)
+    return status_rows(station_type, start, end, query, master_filter)
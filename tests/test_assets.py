@@ -0,0 +1,44 @@
+import gzip
+import pytest
+from flask import Flask
+import assets
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    (tmp_path / "app.abc123.js").write_bytes(b"x" * 100)
+    (tmp_path / "app.abc123.js.gz").write_bytes(gzip.compress(b"x" * 100))
+    (tmp_path / "app.abc123.js.br").write_bytes(b"brotli")
+    (tmp_path / "plain.def456.css").write_bytes(b"body{}")
+    monkeypatch.setattr(assets, "DIST_DIR", str(tmp_path))
+
+    app = Flask(__name__)
+    assets.init_assets(app)
+    return app.test_client()
+
+
+def encoding(client, path, accept):
+    headers = {"Accept-Encoding": accept} if accept is not None else {}
+    res = client.get(path, headers=headers)
+    assert res.status_code == 200
+    assert res.headers["Cache-Control"] == assets.IMMUTABLE
+    assert res.headers["Vary"] == "Accept-Encoding"
+    return res.headers.get("Content-Encoding")
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("br;q=0, gzip", "gzip"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("*", "br"),
+    ("identity", None),
+    (None, None),
+])
+def test_encoding_negotiation(client, accept, expected):
+    assert encoding(client, "/assets/app.abc123.js", accept) == expected
+
+
+def test_no_variant_served_plain(client):
+    assert encoding(client, "/assets/plain.def456.css", "gzip, br") is None
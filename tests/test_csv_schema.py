@@ -0,0 +1,88 @@
+import pytest
+from csv_schema import (
+    STATION_SCHEMA, FS_SCHEMA, HeaderDriftError, normalize_status, to_float
+)
+
+STATION_HEADER = (
+    "STATION_NUMBER,DISTRICT_NAME,BLOCK_NAME,PANCHAYAT_NAME,LATITUDE,"
+    "LONGITUDE,VENDOR_NAME,STATUS,RECORDED_TIME"
+)
+
+
+def read(schema, text):
+    decoder, rows = schema.read(text)
+    return decoder, list(rows)
+
+
+# ================= DRIFT =================
+def test_real_station_header_is_not_drift():
+    decoder, rows = read(STATION_SCHEMA, STATION_HEADER + "\nAWS1,PATNA,B,P,25.6,85.1,V1,Working,01-01-2026\n")
+    assert not decoder.drifted
+    assert decoder.missing == [] and decoder.extra == []
+    assert rows == [{
+        "station_id": "AWS1", "district": "PATNA", "block": "B", "panchayat": "P",
+        "latitude": 25.6, "longitude": 85.1, "vendor": "V1", "status": "WORKING"
+    }]
+
+
+def test_header_matching_ignores_case_space_and_bom():
+    header = "\ufeffstation_number, status ,district_name"
+    decoder, rows = read(STATION_SCHEMA, header + "\nAWS1,faulty,GAYA\n")
+    assert rows[0]["station_id"] == "AWS1"
+    assert rows[0]["status"] == "NON-WORKING"
+    assert rows[0]["district"] == "GAYA"
+
+
+def test_renamed_column_is_reported():
+    header = STATION_HEADER.replace("VENDOR_NAME", "AGENCY_NAME")
+    decoder, rows = read(STATION_SCHEMA, header + "\nAWS1,PATNA,B,P,25.6,85.1,V1,Working,01-01-2026\n")
+    assert decoder.drifted
+    assert decoder.missing == ["VENDOR_NAME"]
+    assert decoder.extra == ["AGENCY_NAME"]
+    assert rows[0]["vendor"] is None
+
+
+def test_missing_required_column_raises():
+    with pytest.raises(HeaderDriftError):
+        STATION_SCHEMA.read(STATION_HEADER.replace("STATUS", "STATE") + "\n")
+
+
+def test_empty_file_raises():
+    with pytest.raises(HeaderDriftError):
+        STATION_SCHEMA.read("")
+
+
+# ================= ROWS =================
+def test_short_rows_are_padded_and_blank_rows_skipped():
+    decoder, rows = read(STATION_SCHEMA, STATION_HEADER + "\nAWS1,PATNA\n\nAWS2\n")
+    assert [r["station_id"] for r in rows] == ["AWS1", "AWS2"]
+    assert rows[0]["district"] == "PATNA"
+    assert rows[0]["latitude"] is None
+    assert rows[0]["status"] == "WORKING"
+    assert rows[1]["district"] == ""
+
+
+def test_decode_single_row_pads():
+    decoder, _ = STATION_SCHEMA.read(STATION_HEADER + "\n")
+    assert decoder.decode(["AWS1"])["vendor"] == ""
+
+
+def test_fs_schema_reads_fault_columns():
+    decoder, rows = read(FS_SCHEMA, "STATION_ID,TEMP.RH,RF,WS,AP,SM,SR,DATA_PKT,Agency\nAWS1,1,0,0,0,0,0,12,X\n")
+    assert not decoder.drifted
+    assert rows[0]["temp_rh"] == "1" and rows[0]["agency"] == "X"
+
+
+# ================= CONVERTERS =================
+@pytest.mark.parametrize("raw, status", [
+    ("", "WORKING"), (None, "WORKING"), ("working", "WORKING"),
+    (" Not Working ", "NON-WORKING"), ("NON WORKING", "NON-WORKING"),
+    ("non-working", "NON-WORKING"), ("FAULTY", "NON-WORKING"), ("unknown", "WORKING"),
+])
+def test_normalize_status(raw, status):
+    assert normalize_status(raw) == status
+
+
+@pytest.mark.parametrize("raw, value", [("25.5", 25.5), ("", None), ("NA", None), (None, None)])
+def test_to_float(raw, value):
+    assert to_float(raw) == value
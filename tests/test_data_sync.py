@@ -0,0 +1,87 @@
+from datetime import datetime
+import data_sync
+from data_sync import diff_days, change_breakdown, store_station_changes, store_district_summary
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.updates = []
+
+    def update_one(self, query, update, upsert=False):
+        self.updates.append((query, update))
+
+
+def statuses(**days):
+    """station_type is ignored; day -> sorted (station_id, status) pairs."""
+    def day_statuses(station_type, data_date):
+        return iter(days.get(data_date.strftime("%Y-%m-%d"), []))
+    return day_statuses
+
+
+# ================= DIFF =================
+def test_diff_days_merge():
+    prev = [("A", "WORKING"), ("B", "NON-WORKING"), ("C", "NON-WORKING"), ("E", "NON-WORKING")]
+    cur = [("A", "NON-WORKING"), ("B", "NON-WORKING"), ("C", "WORKING"), ("D", "NON-WORKING"), ("F", "WORKING")]
+    assert diff_days(prev, cur) == {
+        "newly_failed": ["A", "D"],
+        "recovered": ["C"],
+        "still_failing": ["B"],
+    }
+
+
+def test_diff_days_without_previous_day():
+    cur = [("A", "NON-WORKING"), ("B", "WORKING")]
+    assert diff_days([], cur) == {"newly_failed": ["A"], "recovered": [], "still_failing": []}
+
+
+def test_diff_days_empty_current_day():
+    prev = [("A", "NON-WORKING")]
+    assert diff_days(prev, []) == {"newly_failed": [], "recovered": [], "still_failing": []}
+
+
+def test_change_breakdown_groups_by_field():
+    diff = {"newly_failed": ["A", "B"], "recovered": ["C"], "still_failing": []}
+    master = {"A": {"vendor": "V1"}, "B": {"vendor": "V2"}, "C": {"vendor": "V1"}}
+    assert change_breakdown(diff, master, "vendor") == [
+        {"vendor": "V1", "newly_failed": 1, "recovered": 1, "still_failing": 0},
+        {"vendor": "V2", "newly_failed": 1, "recovered": 0, "still_failing": 0},
+    ]
+
+
+# ================= STORE =================
+def test_store_station_changes(monkeypatch):
+    col = RecordingCollection()
+    monkeypatch.setattr(data_sync, "changes_col", col)
+    monkeypatch.setattr(data_sync, "get_master", lambda t: {"A": {"vendor": "V1", "district": "PATNA"}})
+    monkeypatch.setattr(data_sync, "previous_date", lambda t, d: datetime(2026, 1, 1))
+    monkeypatch.setattr(data_sync, "day_statuses", statuses(**{
+        "2026-01-01": [("A", "WORKING")],
+        "2026-01-02": [("A", "NON-WORKING")],
+    }))
+
+    doc = store_station_changes("AWS", "2026-01-02")
+    assert doc["newly_failed"] == ["A"]
+    assert doc["previous_date"] == datetime(2026, 1, 1)
+    assert doc["counts"] == {"newly_failed": 1, "recovered": 0, "still_failing": 0}
+    assert doc["by_district"][0]["district"] == "PATNA"
+    assert col.updates == [({"station_type": "AWS", "data_date": datetime(2026, 1, 2)}, {"$set": doc})]
+
+
+def test_day_without_facts_stores_no_diff(monkeypatch):
+    col = RecordingCollection()
+    monkeypatch.setattr(data_sync, "changes_col", col)
+    monkeypatch.setattr(data_sync, "get_master", lambda t: {})
+    monkeypatch.setattr(data_sync, "previous_date", lambda t, d: datetime(2026, 1, 1))
+    monkeypatch.setattr(data_sync, "day_statuses", statuses(**{"2026-01-01": [("A", "NON-WORKING")]}))
+
+    assert store_station_changes("AWS", "2026-01-02") is None
+    assert col.updates == []
+
+
+def test_day_without_facts_stores_no_district_summary(monkeypatch):
+    col = RecordingCollection()
+    monkeypatch.setattr(data_sync, "district_col", col)
+    monkeypatch.setattr(data_sync, "day_rows", lambda t, d: iter([]))
+
+    store_district_summary("AWS", "2026-01-02")
+    assert col.updates == []
@@ -0,0 +1,102 @@
+import json, math, random
+import pytest
+import geo
+from geo import LEVELS, build_layer, simplify_line, DistrictIndex, district_aggregates
+
+
+def feature(name, *rings):
+    return {"type": "Feature", "properties": {"DISTRICT": name}, "geometry": {"type": "Polygon", "coordinates": list(rings)}}
+
+
+def wiggly_border(n=201, seed=1):
+    rnd = random.Random(seed)
+    return [[85 + 0.01 * math.sin(i / 3) + rnd.uniform(-0.002, 0.002), 25 + i / (n - 1)] for i in range(n)]
+
+
+def districts():
+    """West and east of a wiggly border, a circular enclave inside the west one,
+    and a sliver smaller than every tolerance hanging off the border."""
+    border = wiggly_border()
+    west = [[84, 25]] + border + [[84, 26], [84, 25]]
+    east = [[86, 25], [86, 26]] + border[::-1] + [[86, 25]]
+    circle = [[84.3 + 0.1 * math.cos(t / 40 * 2 * math.pi), 25.5 + 0.1 * math.sin(t / 40 * 2 * math.pi)] for t in range(40)]
+    circle.append(circle[0])
+    return [
+        feature("WEST", west, circle[::-1]),
+        feature("EAST", east),
+        feature("LAKE", circle),
+    ]
+
+
+def edges(ring):
+    return {frozenset((tuple(a), tuple(b))) for a, b in zip(ring, ring[1:])}
+
+
+def layer(features, level):
+    cfg = LEVELS[level]
+    return {f["properties"]["district"]: f["geometry"]["coordinates"] for f in build_layer(features, cfg["tolerance"], cfg["precision"])["features"]}
+
+
+# ================= SIMPLIFY =================
+def test_simplify_line_keeps_ends_and_drops_collinear():
+    assert simplify_line([[0, 0], [1, 0.0001], [2, 0]], 0.01) == [[0, 0], [2, 0]]
+    assert simplify_line([[0, 0], [1, 1], [2, 0]], 0.01) == [[0, 0], [1, 1], [2, 0]]
+
+
+@pytest.mark.parametrize("level", list(LEVELS))
+def test_shared_border_identical_on_both_sides(level):
+    out = layer(districts(), level)
+    west_outer, hole = out["WEST"][0]
+    east_outer = out["EAST"][0][0]
+
+    shared = edges(west_outer) & edges(east_outer)
+    assert shared
+    # every west edge off the map frame is shared with east: no gap, no sliver
+    assert {e for e in edges(west_outer) if all(p[0] > 84 for p in e)} == shared
+    assert edges(hole) == edges(out["LAKE"][0][0])
+
+
+@pytest.mark.parametrize("level", list(LEVELS))
+def test_tiny_district_keeps_shared_border(level):
+    # a district smaller than the tolerance, sharing a border with a big one
+    border = [[85, 25 + i * 0.001] for i in range(6)]
+    big = [[84, 24.9]] + border + [[84, 25.1], [84, 24.9]]
+    tiny = border[::-1] + [[85.002, 25.0025], border[-1]]
+    out = layer([feature("BIG", big), feature("TINY", tiny)], level)
+
+    tiny_ring = out["TINY"][0][0]
+    assert len(tiny_ring) >= 4 and tiny_ring[0] == tiny_ring[-1]
+    tiny_border = {e for e in edges(tiny_ring) if all(p[0] == 85 for p in e)}
+    assert tiny_border and tiny_border <= edges(out["BIG"][0][0])
+
+
+# ================= SPATIAL INDEX =================
+def test_locate():
+    index = DistrictIndex(districts())
+    assert index.locate(25.2, 84.5) == "WEST"
+    assert index.locate(25.2, 85.5) == "EAST"
+    assert index.locate(25.5, 84.3) == "LAKE"   # inside WEST's hole
+    assert index.locate(27.0, 84.5) is None
+    assert index.locate(None, 84.5) is None
+
+
+def test_district_aggregates_flags_mismatches(monkeypatch):
+    monkeypatch.setattr(geo, "get_district_index", lambda: DistrictIndex(districts()))
+    rows = [
+        {"station_id": "A", "district": "west", "status": "WORKING", "latitude": 25.2, "longitude": 84.5},
+        {"station_id": "B", "district": "West", "status": "NON-WORKING", "latitude": 25.2, "longitude": 85.5},
+    ]
+    (agg,) = district_aggregates(rows)
+    assert agg["district"] == "WEST"
+    assert (agg["total"], agg["working"], agg["non_working"]) == (2, 1, 1)
+    assert agg["mismatched"] == [{"station_id": "B", "located": "EAST"}]
+
+
+def test_district_index_reloads_when_file_appears(monkeypatch, tmp_path):
+    path = tmp_path / "bihar.geojson"
+    monkeypatch.setattr(geo, "GEOJSON_PATH", str(path))
+    monkeypatch.setattr(geo, "_index", {"mtime": None, "index": None})
+
+    assert len(geo.get_district_index()) == 0
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": districts()}))
+    assert geo.get_district_index().locate(25.2, 84.5) == "WEST"
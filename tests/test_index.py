@@ -0,0 +1,98 @@
+from datetime import datetime
+import pytest
+import index
+
+
+class Cursor(list):
+    def sort(self, field, direction):
+        return Cursor(sorted(self, key=lambda d: d[field], reverse=direction < 0))
+
+
+def matches(doc, query):
+    for field, cond in query.items():
+        value = doc.get(field)
+        if isinstance(cond, dict):
+            if "$gte" in cond and not value >= cond["$gte"]:
+                return False
+            if "$lt" in cond and not value < cond["$lt"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class ChangesCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return Cursor(dict(d) for d in self.docs if matches(d, query))
+
+    def find_one(self, query, projection=None, sort=None):
+        found = self.find(query)
+        if sort:
+            found = found.sort(*sort[0])
+        return found[0] if found else None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    docs = [
+        {"station_type": "AWS", "data_date": datetime(2026, 1, d), "previous_date": datetime(2026, 1, d - 1),
+         "newly_failed": [f"A{d}"]}
+        for d in (2, 3, 4)
+    ]
+    monkeypatch.setattr(index, "changes_col", ChangesCollection(docs))
+    return index.app.test_client()
+
+
+# ================= DAY-OVER-DAY CHANGES =================
+def test_changes_latest_without_date(client):
+    doc = client.get("/api/changes?type=AWS").get_json()
+    assert doc["data_date"] == "2026-01-04" and doc["previous_date"] == "2026-01-03"
+
+
+def test_changes_for_one_date(client):
+    assert client.get("/api/changes?type=AWS&date=2026-01-03").get_json()["newly_failed"] == ["A3"]
+    assert client.get("/api/changes?type=AWS&date=2026-01-09").get_json() == {}
+
+
+def test_changes_for_a_range(client):
+    docs = client.get("/api/changes?type=AWS&from=2026-01-01&to=2026-01-03").get_json()
+    assert [d["data_date"] for d in docs] == ["2026-01-02", "2026-01-03"]
+
+
+def test_changes_bad_range(client):
+    assert client.get("/api/changes?type=AWS&from=nope").get_json() == []
+    assert client.get("/api/changes?type=AWS&date=nope").get_json() == {}
+
+
+# ================= DATE RANGE =================
+def test_long_range_keeps_its_last_days():
+    with index.app.test_request_context("/?from=2000-01-01&to=2026-03-31"):
+        start, end = index.requested_range()
+    assert end == datetime(2026, 4, 1)
+    assert (end - start).days == index.MAX_RANGE_DAYS
+
+
+def test_reversed_range_is_swapped():
+    with index.app.test_request_context("/?from=2026-01-05&to=2026-01-02"):
+        assert index.requested_range() == (datetime(2026, 1, 2), datetime(2026, 1, 6))
+
+
+# ================= STATION SEARCH =================
+@pytest.mark.parametrize("limit, expected", [("-1", 1), ("0", 1), ("7", 7), ("500", 50), ("x", 10)])
+def test_search_limit_is_clamped(monkeypatch, limit, expected):
+    calls = []
+
+    class FakeSearch:
+        def refresh(self):
+            pass
+
+        def search(self, q, station_type, limit):
+            calls.append(limit)
+            return []
+
+    monkeypatch.setattr(index, "station_search", FakeSearch())
+    assert index.app.test_client().get(f"/api/search?q=patna&limit={limit}").get_json() == []
+    assert calls == [expected]
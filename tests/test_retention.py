@@ -0,0 +1,158 @@
+import gzip
+from datetime import datetime
+import pytest
+from bson import json_util
+import retention
+from retention import months_before, compact_status, archive_to_files
+
+
+def matches(doc, query):
+    for field, cond in query.items():
+        value = doc.get(field)
+        if isinstance(cond, dict):
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+            bounds = [cond[op] for op in ("$gte", "$lt") if op in cond]
+            # like Mongo, range operators never match across types
+            if any(type(value) is not type(b) for b in bounds):
+                return False
+            if "$gte" in cond and not value >= cond["$gte"]:
+                return False
+            if "$lt" in cond and not value < cond["$lt"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = list(docs)
+        self.it = iter(self.docs)
+
+    def sort(self, field, direction):
+        return Cursor(sorted(self.docs, key=lambda d: d[field], reverse=direction < 0))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.it)
+
+
+class Collection:
+    def __init__(self, docs=()):
+        self.docs = [dict(d, _id=i) for i, d in enumerate(docs)]
+        self.finds = []
+        self.written = []
+        self.updates = []
+
+    def find(self, query, projection=None):
+        self.finds.append(query)
+        return Cursor(d for d in self.docs if matches(d, query))
+
+    def find_one(self, query, projection=None, sort=None):
+        found = Cursor(d for d in self.docs if matches(d, query))
+        if sort:
+            found = found.sort(*sort[0])
+        return next(found, None)
+
+    def aggregate(self, pipeline):
+        found = [d for d in self.docs if matches(d, pipeline[0]["$match"])]
+        return iter([{"docs": len(found), "bytes": 100 * len(found)}] if found else [])
+
+    def delete_many(self, query):
+        self.docs = [d for d in self.docs if not matches(d, query)]
+
+    def bulk_write(self, ops, ordered=True):
+        self.written.extend(ops)
+
+    def update_one(self, query, update, upsert=False):
+        self.updates.append((query, update))
+
+
+def facts():
+    days = [datetime(2025, 11, 30), datetime(2025, 12, 1), datetime(2025, 12, 31), datetime(2026, 1, 2), datetime(2026, 2, 1)]
+    return [
+        {"station_type": "AWS", "station_id": sid, "data_date": d, "status": "NON-WORKING", "fault": {"rf": "1"}}
+        for d in days for sid in ("A", "B")
+    ]
+
+
+@pytest.fixture
+def cols(monkeypatch):
+    status, monthly, meta = Collection(facts()), Collection(), Collection()
+    monkeypatch.setattr(retention, "status_col", status)
+    monkeypatch.setattr(retention, "monthly_col", monthly)
+    monkeypatch.setattr(retention, "meta_col", meta)
+    return status, monthly, meta
+
+
+# ================= MONTHS =================
+def test_months_before_cutoff():
+    col = Collection(facts())
+    assert list(months_before(col, datetime(2026, 1, 15))) == [
+        (datetime(2025, 11, 1), datetime(2025, 12, 1)),
+        (datetime(2025, 12, 1), datetime(2026, 1, 1)),
+        (datetime(2026, 1, 1), datetime(2026, 1, 15)),
+    ]
+    assert list(months_before(Collection(), datetime(2026, 1, 15))) == []
+
+
+# ================= COMPACTION =================
+def test_compaction_runs_month_by_month(cols):
+    status, monthly, meta = cols
+    report = compact_status(datetime(2026, 1, 15), dry_run=False)
+
+    assert report["docs"] == 8
+    # one bounded find per month, never one query for everything
+    assert [q["data_date"]["$gte"].month for q in status.finds] == [11, 12, 1]
+    assert [d["data_date"] for d in status.docs] == [datetime(2026, 2, 1)] * 2
+
+    buckets = {(op._filter["station_id"], op._filter["month"]): op._doc["$set"] for op in monthly.written}
+    assert buckets[("A", datetime(2025, 12, 1))] == {
+        "days.1": {"s": "NON-WORKING", "f": {"rf": "1"}},
+        "days.31": {"s": "NON-WORKING", "f": {"rf": "1"}},
+    }
+    # the cutoff moves forward month by month, ahead of each delete
+    assert [u[1]["$set"]["cutoff"] for u in meta.updates] == [
+        datetime(2025, 12, 1), datetime(2026, 1, 1), datetime(2026, 1, 15)
+    ]
+
+
+def test_compaction_dry_run_changes_nothing(cols):
+    status, monthly, meta = cols
+    report = compact_status(datetime(2026, 1, 15), dry_run=True)
+    assert report["added"] > 0
+    assert len(status.docs) == 10 and monthly.written == [] and meta.updates == []
+
+
+# ================= FILE ARCHIVE =================
+def test_archive_to_files(monkeypatch, tmp_path):
+    col = Collection(facts() + [{"data_date": "2025-10-01"}])
+    monkeypatch.setattr(retention, "db", {"station_faults": col})
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(tmp_path))
+
+    dry = archive_to_files("station_faults", datetime(2026, 1, 1), dry_run=True)
+    assert dry["added"] > 0 and not (tmp_path / "station_faults").exists()
+
+    archive_to_files("station_faults", datetime(2026, 1, 1), dry_run=False)
+    files = sorted(p.name for p in (tmp_path / "station_faults").iterdir())
+    assert files == ["2025-11.jsonl.gz", "2025-12.jsonl.gz"]
+
+    lines = gzip.decompress((tmp_path / "station_faults" / "2025-12.jsonl.gz").read_bytes()).splitlines()
+    assert [json_util.loads(l)["data_date"].day for l in lines] == [1, 1, 31, 31]
+    # string dates are left alone; later months stay in Mongo
+    assert len(col.docs) == 5
+
+
+def test_set_cutoff_resets_the_read_cache(cols, monkeypatch):
+    import station_store
+    status, monthly, meta = cols
+    monkeypatch.setattr(station_store, "meta_col", meta)
+    monkeypatch.setattr(station_store, "_retention_cache", {"checked": None, "cutoff": None})
+
+    assert station_store.archive_cutoff() is None
+    meta.find_one = lambda query, *a, **kw: {"cutoff": datetime(2026, 1, 1)}
+    retention.set_cutoff(datetime(2026, 2, 1))
+    assert station_store.archive_cutoff() == datetime(2026, 1, 1)
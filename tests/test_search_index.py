@@ -0,0 +1,121 @@
+from datetime import datetime
+import pytest
+import search_index
+from search_index import StationSearch, station_terms
+
+T = lambda minute: datetime(2026, 1, 5, 11, minute)
+
+
+class MasterCollection:
+    def __init__(self, docs):
+        self.docs = {(d["station_type"], d["station_id"]): d for d in docs}
+        self.queries = []
+
+    def put(self, doc):
+        self.docs[(doc["station_type"], doc["station_id"])] = doc
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        since = query.get("updated_at", {}).get("$gte")
+        return iter([dict(d) for d in self.docs.values() if since is None or d["updated_at"] >= since])
+
+
+def station(sid, district, block, panchayat, updated_at, station_type="AWS", vendor="V1"):
+    return {
+        "station_type": station_type, "station_id": sid, "district": district, "block": block,
+        "panchayat": panchayat, "vendor": vendor, "updated_at": updated_at
+    }
+
+
+@pytest.fixture
+def search(monkeypatch):
+    col = MasterCollection([
+        station("AWS001", "PATNA", "DANAPUR", "RAM NAGAR", T(0)),
+        station("AWS002", "GAYA", "PATNA CITY", "SHIV NAGAR", T(0)),
+        station("ARG001", "PATNA", "PHULWARI", "PATNAGAR", T(0), station_type="ARG"),
+    ])
+    version = [1]
+    monkeypatch.setattr(search_index, "master_col", col)
+    monkeypatch.setattr(search_index, "master_version", lambda: version[0])
+    monkeypatch.setattr(search_index, "attach_status", lambda results: results)
+
+    s = StationSearch()
+    s.refresh(force=True)
+    return s, col, version
+
+
+def ids(results):
+    return [r["station_id"] for r in results]
+
+
+# ================= TERMS =================
+def test_station_terms_include_later_words():
+    terms = station_terms({"station_id": "AWS1", "panchayat": "Ram  Nagar East"})
+    assert ("ram nagar east", "panchayat") in terms
+    assert ("nagar east", "panchayat") in terms
+    assert ("east", "panchayat") in terms
+    assert ("aws1", "station_id") in terms
+
+
+# ================= RANKING =================
+def test_rank_by_field_then_exact_match(search):
+    s, _, _ = search
+    results = s.search("patna")
+    # block "patna city" (rank 2) beats district "patna" (rank 3); the ARG
+    # station's panchayat "patnagar" (rank 1) beats both
+    assert ids(results) == ["ARG001", "AWS002", "AWS001"]
+    assert [r["matched"] for r in results] == ["panchayat", "block", "district"]
+
+
+def test_station_id_prefix_wins(search):
+    s, _, _ = search
+    assert ids(s.search("aws00")) == ["AWS001", "AWS002"]
+    assert s.search("aws00")[0]["matched"] == "station_id"
+
+
+def test_later_word_matches(search):
+    s, _, _ = search
+    assert ids(s.search("nagar")) == ["AWS001", "AWS002"]
+
+
+def test_type_filter_and_limit(search):
+    s, _, _ = search
+    assert ids(s.search("patna", station_type="ARG")) == ["ARG001"]
+    assert len(s.search("patna", limit=1)) == 1
+    assert s.search("  ") == []
+    assert s.search("zzz") == []
+
+
+# ================= REFRESH =================
+def test_refresh_patches_only_changed_stations(search, monkeypatch):
+    s, col, version = search
+    monkeypatch.setattr(search_index, "FULL_REBUILD_SHARE", 1)
+    col.put(station("AWS001", "NALANDA", "DANAPUR", "RAM NAGAR", T(5)))
+    version[0] = 2
+
+    s.refresh(force=True)
+    assert col.queries[-1] == {"updated_at": {"$gte": T(0)}}
+    assert s.high_water == T(5)
+    assert ids(s.search("nalanda")) == ["AWS001"]
+    # the old district term is gone, not just shadowed
+    assert ids(s.search("patna", station_type="AWS")) == ["AWS002"]
+
+
+def test_refresh_skips_when_version_unchanged(search):
+    s, col, _ = search
+    queries = len(col.queries)
+    s.checked = None
+    s.refresh()
+    assert len(col.queries) == queries
+
+
+def test_refresh_rebuilds_when_most_stations_changed(search, monkeypatch):
+    s, col, version = search
+    rebuilds = []
+    monkeypatch.setattr(s, "rebuild", lambda: rebuilds.append(1))
+    col.put(station("AWS003", "SIWAN", "SIWAN", "X", T(5)))
+    version[0] = 2
+
+    s.refresh(force=True)
+    # every station has updated_at >= high water, far above FULL_REBUILD_SHARE
+    assert rebuilds == [1]
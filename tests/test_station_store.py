@@ -0,0 +1,222 @@
+from datetime import datetime
+import pytest
+import station_store
+from station_store import latest_rows, latest_facts, status_counts
+
+D = lambda day: datetime(2026, 1, day)
+
+
+class AggregateCollection:
+    """Returns canned $group output and keeps the pipeline it was sent."""
+
+    def __init__(self, results):
+        self.results = results
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return iter([dict(r) for r in self.results])
+
+
+@pytest.fixture
+def store(monkeypatch):
+    def setup(hot=(), archived=(), cutoff=None, master=None, history=None):
+        col = AggregateCollection(hot)
+        monkeypatch.setattr(station_store, "status_col", col)
+        monkeypatch.setattr(station_store, "archive_cutoff", lambda: cutoff)
+        monkeypatch.setattr(station_store, "archived_facts", lambda t, s, e, q=None: list(archived))
+        monkeypatch.setattr(station_store, "get_master", lambda t: master or {})
+        monkeypatch.setattr(station_store, "get_history", lambda t: history or {})
+        return col
+    return setup
+
+
+# ================= LATEST PER STATION =================
+def test_latest_is_grouped_in_mongo(store):
+    col = store(hot=[{"_id": "A", "data_date": D(5), "status": "WORKING", "fault": None}])
+    facts = latest_facts("AWS", D(1), D(10))
+
+    assert facts == {"A": {"station_id": "A", "data_date": D(5), "status": "WORKING"}}
+    match, sort, group = col.pipelines[0]
+    assert match["$match"] == {"station_type": "AWS", "data_date": {"$gte": D(1), "$lt": D(10)}}
+    assert sort == {"$sort": {"data_date": 1}}
+    assert group["$group"]["_id"] == "$station_id"
+    assert group["$group"]["status"] == {"$last": "$status"}
+
+
+def test_hot_tier_wins_over_archived(store):
+    store(
+        cutoff=D(5),
+        archived=[
+            {"station_id": "A", "data_date": D(2), "status": "NON-WORKING"},
+            {"station_id": "B", "data_date": D(3), "status": "NON-WORKING"},
+        ],
+        hot=[{"_id": "A", "data_date": D(7), "status": "WORKING"}]
+    )
+    facts = latest_facts("AWS", D(1), D(10))
+    assert facts["A"]["status"] == "WORKING"
+    assert facts["B"]["status"] == "NON-WORKING"
+    assert status_counts("AWS", D(1), D(10)) == {"WORKING": 1, "NON-WORKING": 1}
+
+
+def test_latest_rows_join_point_in_time_master(store):
+    master = {"A": {"station_id": "A", "district": "PATNA", "vendor": "V2", "valid_from": D(6)}}
+    history = {"A": ([datetime.min], [{"district": "GAYA", "vendor": "V1", "valid_from": None, "valid_to": D(6)}])}
+    store(
+        hot=[{"_id": "A", "data_date": D(4), "status": "NON-WORKING", "fault": {"rf": "1"}}],
+        master=master, history=history
+    )
+
+    rows = latest_rows("AWS", D(1), D(5))
+    assert rows == [{
+        "station_id": "A", "district": "GAYA", "vendor": "V1",
+        "data_date": D(4), "status": "NON-WORKING", "fault": {"rf": "1"}
+    }]
+    assert latest_rows("AWS", D(1), D(5), {"vendor": "V2"}) == []
+    assert len(latest_rows("AWS", D(1), D(5), {"vendor": "V1"})) == 1
+
+
+def test_station_without_master_still_listed(store):
+    store(hot=[{"_id": "Z", "data_date": D(4), "status": "WORKING"}])
+    assert latest_rows("AWS", D(1), D(5)) == [{"station_id": "Z", "data_date": D(4), "status": "WORKING"}]
+
+
+# ================= WRITE =================
+class WriteCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.ops = []
+        self.inserted = []
+        self.updates = []
+
+    def find(self, query, projection=None):
+        return iter([dict(d) for d in self.docs])
+
+    def bulk_write(self, ops, ordered=True):
+        self.ops.extend(ops)
+
+    def insert_many(self, docs):
+        self.inserted.extend(docs)
+
+    def update_one(self, query, update, upsert=False):
+        self.updates.append((query, update))
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    def setup(master=()):
+        cols = {name: WriteCollection(master if name == "master_col" else ()) for name in
+                ("master_col", "master_history_col", "status_col", "meta_col")}
+        for name, col in cols.items():
+            monkeypatch.setattr(station_store, name, col)
+        monkeypatch.setattr(station_store, "_master_cache", {"AWS": "stale"})
+        monkeypatch.setattr(station_store, "_history_cache", {"AWS": "stale"})
+        return cols
+    return setup
+
+
+def test_recovered_day_drops_old_fault(writes):
+    cols = writes()
+    station_store.store_station_rows("AWS", "2026-01-05", [
+        {"station_id": "A", "status": "WORKING"},
+        {"station_id": "B", "status": "NON-WORKING"},
+    ])
+    a, b = cols["status_col"].ops
+    assert a._doc == {"$set": {"status": "WORKING"}, "$unset": {"fault": ""}}
+    assert b._doc == {"$set": {"status": "NON-WORKING"}}
+
+
+def test_new_station_starts_version_one(writes):
+    cols = writes()
+    res = station_store.store_station_rows("AWS", "2026-01-05", [{"station_id": "A", "status": "WORKING", "district": "PATNA"}])
+
+    assert res == {"stations": 1, "master_changes": 1}
+    (op,) = cols["master_col"].ops
+    assert op._doc["$set"]["version"] == 1 and op._doc["$set"]["valid_from"] == D(5)
+    assert op._doc["$setOnInsert"] == {"first_seen": D(5)}
+    assert cols["master_history_col"].inserted == []
+    assert cols["meta_col"].updates == [({"_id": "station_master"}, {"$inc": {"version": 1}})]
+    assert station_store._master_cache == {} and station_store._history_cache == {}
+
+
+def test_changed_attribute_moves_old_version_to_history(writes):
+    current = {"station_type": "AWS", "station_id": "A", "district": "GAYA", "vendor": "V1", "version": 2, "valid_from": D(2)}
+    cols = writes([current])
+    station_store.store_station_rows("AWS", "2026-01-05", [
+        {"station_id": "A", "status": "WORKING", "district": "PATNA", "vendor": None}
+    ])
+
+    (old,) = cols["master_history_col"].inserted
+    assert (old["district"], old["vendor"], old["version"]) == ("GAYA", "V1", 2)
+    assert (old["valid_from"], old["valid_to"]) == (D(2), D(5))
+    (op,) = cols["master_col"].ops
+    # a missing value doesn't erase what we know
+    assert op._doc["$set"]["district"] == "PATNA" and "vendor" not in op._doc["$set"]
+    assert op._doc["$inc"] == {"version": 1}
+
+
+def test_unchanged_or_backfilled_day_keeps_master(writes):
+    current = {"station_type": "AWS", "station_id": "A", "district": "GAYA", "version": 2, "valid_from": D(5)}
+    cols = writes([current])
+    station_store.store_station_rows("AWS", "2026-01-06", [{"station_id": "A", "status": "WORKING", "district": "GAYA"}])
+    # an older file can't rewrite the current version
+    station_store.store_station_rows("AWS", "2026-01-03", [{"station_id": "A", "status": "WORKING", "district": "PATNA"}])
+
+    assert cols["master_col"].ops == [] and cols["master_history_col"].inserted == []
+    assert cols["meta_col"].updates == []
+    assert len(cols["status_col"].ops) == 2
+
+
+# ================= POINT IN TIME =================
+def test_master_as_of():
+    m = {"station_id": "A", "district": "PATNA", "valid_from": D(20)}
+    history = {"A": ([datetime.min, D(10)], [
+        {"district": "GAYA", "valid_from": None, "valid_to": D(10)},
+        {"district": "NALANDA", "valid_from": D(10), "valid_to": D(20)},
+    ])}
+    as_of = lambda day: station_store.master_as_of(m, history, D(day))["district"]
+    assert [as_of(d) for d in (1, 9, 10, 19, 20, 25)] == ["GAYA", "GAYA", "NALANDA", "NALANDA", "PATNA", "PATNA"]
+
+
+def test_master_as_of_gap_and_no_history():
+    m = {"station_id": "A", "district": "PATNA", "valid_from": D(20)}
+    history = {"A": ([D(5)], [{"district": "GAYA", "valid_from": D(5), "valid_to": D(10)}])}
+    # before the first recorded version, or in a gap: the current master
+    assert station_store.master_as_of(m, history, D(1))["district"] == "PATNA"
+    assert station_store.master_as_of(m, history, D(12))["district"] == "PATNA"
+    assert station_store.master_as_of(m, {}, D(1)) is m
+
+
+def test_load_history_orders_versions(monkeypatch):
+    class SortableList(list):
+        def sort(self, field, direction):
+            return sorted(self, key=lambda d: d[field])
+
+    class HistoryCollection:
+        def find(self, query, projection):
+            return SortableList([
+                {"station_id": "A", "version": 2, "district": "NALANDA", "valid_from": D(10), "valid_to": D(20)},
+                {"station_id": "A", "version": 1, "district": "GAYA", "valid_from": None, "valid_to": D(10)},
+            ])
+
+    monkeypatch.setattr(station_store, "master_history_col", HistoryCollection())
+    starts, versions = station_store._load_history("AWS")["A"]
+    assert starts == [datetime.min, D(10)]
+    assert [v["district"] for v in versions] == ["GAYA", "NALANDA"]
+
+
+def test_versioned_cache_reloads_on_version_change(monkeypatch):
+    version = [1]
+    loads = []
+    monkeypatch.setattr(station_store, "master_version", lambda: version[0])
+    monkeypatch.setattr(station_store, "MASTER_CACHE_TTL", 0)
+    cache = {}
+
+    def load(t):
+        loads.append(t)
+        return {"n": len(loads)}
+
+    assert station_store._versioned(cache, "AWS", load) == {"n": 1}
+    assert station_store._versioned(cache, "AWS", load) == {"n": 1}
+    version[0] = 2
+    assert station_store._versioned(cache, "AWS", load) == {"n": 2}
@@ -0,0 +1,241 @@
+import threading, time
+import pytest
+from upstream import (
+    CircuitBreaker, SWRCache, UpstreamUnavailable, UpstreamClientError
+)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class HTTPError(Exception):
+    """Shaped like requests.HTTPError: the response rides on the exception."""
+
+    def __init__(self, status_code):
+        super().__init__(f"{status_code} error")
+        self.response = Response(status_code)
+
+
+def failing(exc):
+    def fetch():
+        raise exc
+    return fetch
+
+
+def make_cache(clock, **kw):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    return breaker, SWRCache(breaker, fresh_for=60, max_stale=3600, workers=1, clock=clock, **kw)
+
+
+def drain(cache):
+    # one worker: once this runs, every refresh submitted before it has finished
+    cache.pool.submit(lambda: None).result()
+
+
+# ================= CIRCUIT BREAKER =================
+def test_breaker_closed_open_half_open_closed():
+    clock = FakeClock()
+    b = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    assert b.state == b.CLOSED and b.allow()
+
+    b.record_failure()
+    assert b.state == b.CLOSED
+    b.record_failure()
+    assert b.state == b.OPEN
+    assert not b.allow()
+    assert b.retry_after() == 31
+
+    clock.advance(30)
+    assert b.state == b.HALF_OPEN
+    assert b.allow()          # the single trial call
+    assert not b.allow()      # everyone else waits for it
+
+    b.record_success()
+    assert b.state == b.CLOSED and b.allow()
+
+
+def test_failed_trial_reopens():
+    clock = FakeClock()
+    b = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    b.record_failure()
+    b.record_failure()
+    clock.advance(30)
+    assert b.allow()
+
+    b.record_failure()
+    assert b.state == b.OPEN
+    clock.advance(29)
+    assert not b.allow()
+
+
+# ================= STALE-WHILE-REVALIDATE =================
+def test_fresh_entry_skips_upstream():
+    clock = FakeClock()
+    _, cache = make_cache(clock)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return ["a"]
+
+    assert cache.get("k", fetch)[0] == ["a"]
+    clock.advance(59)
+    data, meta = cache.get("k", fetch)
+    assert data == ["a"] and not meta["stale"] and meta["age"] == 59
+    assert len(calls) == 1
+
+
+def test_stale_entry_served_while_refreshing():
+    clock = FakeClock()
+    _, cache = make_cache(clock)
+    cache.get("k", lambda: ["old"])
+
+    clock.advance(61)
+    data, meta = cache.get("k", lambda: ["new"])
+    assert data == ["old"] and meta["stale"] and meta["age"] == 61
+
+    drain(cache)
+    data, meta = cache.get("k", lambda: ["newer"])
+    assert data == ["new"] and not meta["stale"]
+
+
+def test_stale_entry_served_while_upstream_down():
+    clock = FakeClock()
+    breaker, cache = make_cache(clock)
+    cache.get("k", lambda: ["old"])
+
+    clock.advance(61)
+    for _ in range(3):
+        data, meta = cache.get("k", failing(ConnectionError("refused")))
+        drain(cache)
+        assert data == ["old"] and meta["stale"]
+    assert breaker.state == breaker.OPEN
+    assert cache.get("k", failing(ConnectionError("refused")))[1]["circuit"] == "open"
+
+
+def test_entry_past_max_stale_is_fetched_again():
+    clock = FakeClock()
+    _, cache = make_cache(clock)
+    cache.get("k", lambda: ["old"])
+
+    clock.advance(3601)
+    data, meta = cache.get("k", lambda: ["new"])
+    assert data == ["new"] and not meta["stale"]
+
+
+# ================= COLD MISS =================
+def test_cold_miss_while_open_is_unavailable():
+    clock = FakeClock()
+    breaker, cache = make_cache(clock)
+    for key in ("a", "b"):
+        with pytest.raises(UpstreamUnavailable):
+            cache.get(key, failing(TimeoutError("timed out")))
+    assert breaker.state == breaker.OPEN
+
+    calls = []
+    with pytest.raises(UpstreamUnavailable, match="circuit open"):
+        cache.get("c", lambda: calls.append(1))
+    assert calls == []
+
+    clock.advance(30)
+    assert cache.get("c", lambda: ["ok"])[0] == ["ok"]
+    assert breaker.state == breaker.CLOSED
+
+
+def test_5xx_counts_as_failure():
+    clock = FakeClock()
+    breaker, cache = make_cache(clock)
+    for _ in range(2):
+        with pytest.raises(UpstreamUnavailable):
+            cache.get("k", failing(HTTPError(502)))
+    assert breaker.state == breaker.OPEN
+
+
+def test_4xx_passes_through_without_tripping():
+    clock = FakeClock()
+    breaker, cache = make_cache(clock)
+    for _ in range(5):
+        with pytest.raises(UpstreamClientError) as e:
+            cache.get("k", failing(HTTPError(404)))
+        assert e.value.status == 404
+    assert breaker.state == breaker.CLOSED
+
+
+def test_4xx_closes_half_open_trial():
+    clock = FakeClock()
+    breaker, cache = make_cache(clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.advance(30)
+
+    with pytest.raises(UpstreamClientError):
+        cache.get("k", failing(HTTPError(400)))
+    assert breaker.state == breaker.CLOSED
+
+
+# ================= COALESCING =================
+def concurrent_misses(cache, fetch, n=4):
+    results = [None] * n
+
+    def worker(i):
+        try:
+            results[i] = cache.get("k", fetch)[0]
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+        time.sleep(0.02)
+    return threads, results
+
+
+def test_concurrent_cold_misses_share_one_fetch():
+    _, cache = make_cache(FakeClock())
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return ["data"]
+
+    threads, results = concurrent_misses(cache, fetch)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(calls) == 1
+    assert results == [["data"]] * 4
+
+
+def test_concurrent_cold_misses_share_one_failure():
+    breaker, cache = make_cache(FakeClock())
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        raise ConnectionError("refused")
+
+    threads, results = concurrent_misses(cache, fetch)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(calls) == 1
+    assert all(isinstance(r, UpstreamUnavailable) for r in results)
+    assert breaker.failures == 1
+    assert cache.inflight == {}
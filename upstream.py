@@ -0,0 +1,209 @@
+# upstream.py
+# Stale-while-revalidate cache and circuit breaker for the upstream BMSK APIs
+# used by direct.py.
+import time, threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class UpstreamUnavailable(Exception):
+    pass
+
+
+class UpstreamClientError(Exception):
+    """Upstream answered with a 4xx: this request was wrong, upstream is fine."""
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+
+
+def client_error_status(e):
+    """The status of a 4xx HTTP error (requests.HTTPError or alike), else None.
+
+    Connection errors, timeouts and 5xx responses carry no 4xx status and
+    count against the circuit breaker.
+    """
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    if status is not None and 400 <= status < 500:
+        return status
+    return None
+
+
+# ================= CIRCUIT BREAKER =================
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` consecutive failures; after
+    `reset_timeout` seconds one trial call is let through (half-open) and its
+    outcome closes or re-opens the circuit."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self.trial_running = False
+
+    def retry_after(self):
+        if self.opened_at is None:
+            return 0
+        return max(0, int(self.reset_timeout - (self.clock() - self.opened_at)) + 1)
+
+
+# ================= STALE-WHILE-REVALIDATE =================
+class SWRCache:
+    """Serve the last good response for a key immediately; once it is older
+    than `fresh_for` seconds, refresh it in the background. Entries older
+    than `max_stale` are dropped and fetched again synchronously.
+
+    At most one fetch per key runs at a time: concurrent misses wait on the
+    in-flight future instead of each calling upstream."""
+
+    def __init__(self, breaker, fresh_for=60, max_stale=24 * 3600, max_entries=256,
+                 workers=2, clock=time.time):
+        self.breaker = breaker
+        self.fresh_for = fresh_for
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = OrderedDict()   # key -> (data, fetched_at)
+        self.inflight = {}             # key -> Future of (data, fetched_at)
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="swr")
+
+    def _store(self, key, data):
+        with self.lock:
+            fetched_at = self.clock()
+            self.entries[key] = (data, fetched_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return fetched_at
+
+    def _fetch(self, key, fetch):
+        try:
+            data = fetch()
+        except Exception as e:
+            status = client_error_status(e)
+            if status is None:
+                self.breaker.record_failure()
+                raise
+            # upstream answered, so it is healthy; this also ends a half-open trial
+            self.breaker.record_success()
+            raise UpstreamClientError(status, str(e)) from e
+        self.breaker.record_success()
+        return data, self._store(key, data)
+
+    def _claim(self, key):
+        """(future, True) for the caller that should fetch `key`; (future, False)
+        when a fetch is already in flight and the caller should wait on it."""
+        with self.lock:
+            fut = self.inflight.get(key)
+            if fut is not None:
+                return fut, False
+            fut = self.inflight[key] = Future()
+            return fut, True
+
+    def _settle(self, key, fut, result=None, error=None):
+        with self.lock:
+            self.inflight.pop(key, None)
+        if error is None:
+            fut.set_result(result)
+        else:
+            fut.set_exception(error)
+
+    def _resolve(self, key, fetch, fut):
+        try:
+            result = self._fetch(key, fetch)
+        except UpstreamClientError as e:
+            self._settle(key, fut, error=e)
+        except Exception as e:
+            error = UpstreamUnavailable(str(e))
+            error.__cause__ = e
+            self._settle(key, fut, error=error)
+        else:
+            self._settle(key, fut, result)
+
+    def _refresh(self, key, fetch, fut):
+        self._resolve(key, fetch, fut)
+        if fut.exception():
+            print("Upstream refresh failed:", key, fut.exception())
+
+    def _meta(self, fetched_at, stale):
+        age = self.clock() - fetched_at
+        return {
+            "stale": stale,
+            "age": int(age),
+            "fetched_at": fetched_at,
+            "circuit": self.breaker.state
+        }
+
+    def get(self, key, fetch):
+        """Return (data, freshness metadata) or raise UpstreamUnavailable /
+        UpstreamClientError."""
+        with self.lock:
+            entry = self.entries.get(key)
+        now = self.clock()
+
+        if entry and now - entry[1] > self.max_stale:
+            entry = None
+
+        if entry:
+            data, fetched_at = entry
+            if now - fetched_at < self.fresh_for:
+                return data, self._meta(fetched_at, stale=False)
+
+            fut, start = self._claim(key)
+            if start and self.breaker.allow():
+                self.pool.submit(self._refresh, key, fetch, fut)
+            elif start:
+                self._settle(key, fut, error=UpstreamUnavailable("circuit open"))
+            return data, self._meta(fetched_at, stale=True)
+
+        # nothing cached: the caller has to wait for upstream, or for the
+        # fetch another request already started
+        fut, leader = self._claim(key)
+        if leader:
+            if self.breaker.allow():
+                self._resolve(key, fetch, fut)
+            else:
+                self._settle(key, fut, error=UpstreamUnavailable("circuit open"))
+
+        data, fetched_at = fut.result()
+        return data, self._meta(fetched_at, stale=False)